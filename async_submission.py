@@ -0,0 +1,162 @@
+from quart import Quart, Response, request, jsonify
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.async_scheduler import AsyncMeetingScheduler
+from src.batch_runner import BatchRunner, parse_batch_payload
+from src.metrics import render_metrics
+from src.request_history import RequestHistory
+from utils.tracing import configure_logging
+
+# Per-request detail is logged at DEBUG; set LOG_LEVEL=DEBUG (or --debug) to see it
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Async variant of main_submission.py: one process keeps many /receive requests in
+# flight against vLLM instead of blocking a worker per request. Needs quart and
+# hypercorn on top of the Flask server's dependencies (pip install quart hypercorn)
+#   hypercorn async_submission:app --bind 0.0.0.0:5001
+# or
+#   python async_submission.py --port 5001
+app = Quart(__name__)
+# Bounded history of recent requests, queryable through /history
+request_history = RequestHistory.from_env()
+
+# Upper bound on requests a single /receive_batch call keeps in flight
+MAX_BATCH_CONCURRENCY = int(os.environ.get("MAX_BATCH_CONCURRENCY", 64))
+# Micro-batching of LLM calls across concurrent requests (off by default). Batches go to
+# /v1/completions with prompts in deepseek-llm-chat's template (src.prompts.render_chat_prompt),
+# so only enable it for that model; it takes precedence over LLM_STREAM
+LLM_BATCH_MAX_SIZE = int(os.environ.get("LLM_BATCH_MAX_SIZE", 0))
+LLM_BATCH_MAX_WAIT_MS = float(os.environ.get("LLM_BATCH_MAX_WAIT_MS", 10))
+# LLM_STREAM=1 streams un-batched LLM replies and stops at the end of their JSON object
+LLM_STREAM = os.environ.get("LLM_STREAM", "0") == "1"
+
+# Built inside the serving event loop so the AsyncOpenAI client binds to it
+meeting_scheduler = None
+
+@app.before_serving
+async def start_meeting_scheduler():
+    """Create this process's scheduler once the event loop is running"""
+    global meeting_scheduler
+    meeting_scheduler = AsyncMeetingScheduler(
+        llm_batch_max_size=LLM_BATCH_MAX_SIZE, llm_batch_max_wait_ms=LLM_BATCH_MAX_WAIT_MS,
+        llm_stream=LLM_STREAM
+    )
+    await meeting_scheduler.warm_up()
+
+@app.after_serving
+async def stop_meeting_scheduler():
+    """Release the scheduler's resources and the request history on shutdown"""
+    meeting_scheduler.close()
+    request_history.close()
+
+async def your_meeting_assistant(data):
+    """Main function called by the submission system"""
+    try:
+        # Use the meeting scheduler to process the request
+        return await meeting_scheduler.schedule_meeting(data)
+    except Exception as e:
+        logger.exception("Error in your_meeting_assistant: %s", e)
+        # Return minimal valid response
+        return meeting_scheduler.create_error_response(data, str(e))
+
+@app.route('/receive', methods=['POST'])
+async def receive():
+    """Endpoint to receive meeting requests"""
+    try:
+        data = await request.get_json()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received: %s", json.dumps(data, indent=2))
+
+        # Process the meeting request
+        new_data = await your_meeting_assistant(data)
+
+        # Store for debugging
+        request_history.record(data, new_data)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending: %s", json.dumps(new_data, indent=2))
+        return jsonify(new_data)
+
+    except Exception as e:
+        logger.exception("Error in receive endpoint: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/receive_batch', methods=['POST'])
+async def receive_batch():
+    """Endpoint to receive many meeting requests (JSON array or NDJSON); streams NDJSON results as they finish"""
+    try:
+        batch = parse_batch_payload(await request.get_data(as_text=True))
+    except ValueError as e:
+        return jsonify({"error": f"invalid batch: {e}"}), 400
+
+    concurrency = min(request.args.get('concurrency', default=16, type=int), MAX_BATCH_CONCURRENCY)
+    runner = BatchRunner(meeting_scheduler, concurrency)
+    logger.debug("Received batch of %d requests (concurrency %d)", len(batch), runner.concurrency)
+
+    async def generate():
+        async for data, result in runner.arun(batch):
+            request_history.record(data, result)
+            yield json.dumps(result) + "\n"
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@app.route('/history', methods=['GET'])
+async def history():
+    """Look up recent requests by ?request_id=..., or list the latest ?limit=N"""
+    request_id = request.args.get('request_id')
+    if request_id:
+        entries = request_history.find(request_id)
+        if not entries:
+            return jsonify({"error": f"no history for request_id {request_id}"}), 404
+    else:
+        entries = request_history.recent(request.args.get('limit', default=20, type=int))
+    return jsonify({"entries": entries, "stats": request_history.stats()})
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    """Prometheus metrics for this process"""
+    return Response(render_metrics(meeting_scheduler), mimetype='text/plain; version=0.0.4')
+
+@app.route('/health', methods=['GET'])
+async def health():
+    """Health check endpoint"""
+    return jsonify({"status": "healthy", "service": "AI Scheduling Assistant"})
+
+@app.route('/test', methods=['GET'])
+async def test():
+    """Test endpoint to verify server is running"""
+    return jsonify({
+        "message": "AI Scheduling Assistant is running",
+        "endpoints": ["/receive", "/receive_batch", "/history", "/metrics", "/health", "/test"],
+        "total_requests_processed": request_history.total_recorded
+    })
+
+def run_async_server(host='0.0.0.0', port=5001):
+    """Serve the app with hypercorn on a single event loop"""
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    config = Config()
+    config.bind = [f"{host}:{port}"]
+    config.graceful_timeout = 20
+    asyncio.run(serve(app, config))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI Scheduling Assistant async server")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 5001)))
+    parser.add_argument("--debug", action="store_true", help="enable DEBUG logging")
+    args = parser.parse_args()
+    if args.debug:
+        configure_logging(debug=True)
+
+    print("Starting AI Scheduling Assistant Server (async)...")
+    print(f"Server will be available at http://{args.host}:{args.port}")
+    run_async_server(args.host, args.port)
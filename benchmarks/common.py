@@ -0,0 +1,60 @@
+import math
+import random
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+EMAIL_TEMPLATES = [
+    # Confident enough for the rule fast path
+    "Hi team, let's meet on {weekday} for {duration} minutes to review the roadmap.",
+    "Can we sync tomorrow at 10:00 AM for half an hour?",
+    "Urgent: need a 1 hour call on {weekday} between 2 and 4 PM.",
+    # Vague enough to need the LLM
+    "Hey, could we find some time next week to go over the launch plan?",
+    "Let's catch up soon about the hiring pipeline, whenever works for everyone.",
+]
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize(values):
+    """count/mean/p50/p95/p99/max of a list of numbers"""
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": values[-1]
+    }
+
+def attendee_emails(count, domain="bench.local"):
+    """Deterministic attendee addresses"""
+    return [f"user{i:03d}@{domain}" for i in range(count)]
+
+def make_request(request_id, attendees, rng, request_datetime="21-07-2025T09:00:00"):
+    """A synthetic /receive payload with the given number of attendees"""
+    emails = attendee_emails(max(attendees, 1))
+    template = rng.choice(EMAIL_TEMPLATES)
+    return {
+        "Request_id": f"bench-{request_id}",
+        "Datetime": request_datetime,
+        "Location": "IIT Mumbai",
+        "From": emails[0],
+        "Attendees": [{"email": email} for email in emails[1:]],
+        "Subject": "Benchmark meeting",
+        "EmailContent": template.format(weekday=rng.choice(WEEKDAYS), duration=rng.choice([30, 45, 60]))
+    }
+
+def make_requests(count, attendees, seed=0):
+    """A reproducible list of synthetic requests"""
+    rng = random.Random(seed)
+    return [make_request(i, attendees, rng) for i in range(count)]
@@ -0,0 +1,104 @@
+import random
+import time
+import zlib
+from datetime import datetime, timedelta
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.calendar_integration import CalendarManager
+from utils.intervals import IST
+from utils.time_utils import to_epoch_seconds
+
+class FakeCredentials:
+    """Stands in for google.oauth2 Credentials; never expires"""
+    expired = False
+
+    def __init__(self, email):
+        self.email = email
+
+    def refresh(self, request):
+        pass
+
+class _FakeRequest:
+    def __init__(self, result, latency_ms):
+        self._result = result
+        self._latency_ms = latency_ms
+
+    def execute(self):
+        if self._latency_ms:
+            time.sleep(self._latency_ms / 1000)
+        return self._result
+
+class _FakeEvents:
+    def __init__(self, service):
+        self._service = service
+
+    def list(self, calendarId='primary', timeMin=None, timeMax=None, syncToken=None, pageToken=None, **params):
+        return _FakeRequest(self._service.list_events(timeMin, timeMax, syncToken), self._service.latency_ms)
+
+class FakeCalendarService:
+    """Minimal events().list(...).execute() surface over a synthetic calendar"""
+
+    def __init__(self, events, latency_ms=0):
+        self.items = events
+        self.latency_ms = latency_ms
+
+    def events(self):
+        return _FakeEvents(self)
+
+    def list_events(self, time_min, time_max, sync_token):
+        if sync_token:
+            # Synthetic calendars never change, so incremental syncs are empty
+            return {"items": [], "nextSyncToken": sync_token}
+        if time_min is None:
+            return {"items": list(self.items), "nextSyncToken": "synthetic"}
+        start_ts, end_ts = to_epoch_seconds(time_min), to_epoch_seconds(time_max)
+        return {"items": [
+            event for event in self.items
+            if to_epoch_seconds(event["start"]["dateTime"]) < end_ts
+            and to_epoch_seconds(event["end"]["dateTime"]) > start_ts
+        ]}
+
+def synthetic_events(email, start_date, days, events_per_day, seed=0):
+    """Deterministic business-hours events for one user, in Calendar API format"""
+    rng = random.Random(zlib.crc32(email.encode("utf-8")) ^ seed)
+    events = []
+    for day in range(days):
+        date = start_date + timedelta(days=day)
+        if date.weekday() >= 5:
+            continue
+        for i in range(events_per_day):
+            start = date.replace(hour=rng.randint(9, 17), minute=rng.choice([0, 30]))
+            end = start + timedelta(minutes=rng.choice([30, 30, 60, 90]))
+            events.append({
+                "id": f"{email}-{day}-{i}",
+                "summary": "Synthetic event",
+                "start": {"dateTime": start.isoformat()},
+                "end": {"dateTime": end.isoformat()},
+                "attendees": [{"email": email}]
+            })
+    events.sort(key=lambda event: event["start"]["dateTime"])
+    return events
+
+class FakeCalendarManager(CalendarManager):
+    """CalendarManager backed by synthetic calendars instead of Google tokens
+
+    Every user gets events_per_day random business-hours events on weekdays for `days`
+    days from start_date; api_latency_ms simulates the Calendar API round trip.
+    """
+
+    def __init__(self, events_per_day=4, days=30, start_date=None, api_latency_ms=0, seed=0, **kwargs):
+        super().__init__(**kwargs)
+        self.events_per_day = events_per_day
+        self.days = days
+        self.start_date = start_date or datetime(2025, 7, 14, tzinfo=IST)
+        self.api_latency_ms = api_latency_ms
+        self.seed = seed
+
+    def get_user_credentials(self, email):
+        return FakeCredentials(email)
+
+    def _build_service(self, creds):
+        events = synthetic_events(creds.email, self.start_date, self.days, self.events_per_day, self.seed)
+        return FakeCalendarService(events, self.api_latency_ms)
@@ -0,0 +1,137 @@
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import make_requests, summarize
+from benchmarks.fake_calendar import FakeCalendarManager
+from benchmarks.mock_vllm import TRAILING_TEXT, MockVLLMServer
+from src.metrics import stage_label
+
+# End-to-end load benchmark without a GPU or Google tokens:
+#   python benchmarks/load.py --rps 20 --duration 30 --attendees 5 --llm-latency-ms 300
+# starts the mock vLLM server and the Flask app (with a synthetic calendar backend)
+# in-process and drives /receive open-loop at the target rate. Pass --url to load an
+# already running server instead.
+
+def start_app(vllm_base_url, calendar_manager, llm_batch_max_size=0, llm_batch_max_wait_ms=10, llm_stream=False):
+    """Serve main_submission's Flask app from a background thread; returns the /receive URL"""
+    from werkzeug.serving import make_server
+    import main_submission
+    from src.meeting_scheduler import MeetingScheduler
+
+    main_submission.meeting_scheduler = MeetingScheduler(
+        vllm_base_url=vllm_base_url, calendar_manager=calendar_manager,
+        llm_batch_max_size=llm_batch_max_size, llm_batch_max_wait_ms=llm_batch_max_wait_ms, llm_stream=llm_stream
+    )
+    server = make_server("127.0.0.1", 0, main_submission.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True, name="bench-app").start()
+    return f"http://127.0.0.1:{server.server_port}/receive", server
+
+def post_json(url, payload, timeout):
+    """POST a JSON payload and return (status, decoded body or None)"""
+    body = json.dumps(payload).encode("utf-8")
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read())
+    except Exception:
+        return None, None
+
+def run_load(url, requests, rps, max_in_flight=256, timeout=60):
+    """Send requests open-loop at `rps`; returns (samples, wall seconds)"""
+    samples = []
+    samples_lock = threading.Lock()
+
+    def send(request_data):
+        started = time.perf_counter()
+        status, result = post_json(url, request_data, timeout)
+        sample = {
+            "latency_ms": (time.perf_counter() - started) * 1000,
+            "ok": status == 200 and result is not None and "error" not in result.get("MetaData", {}),
+            "timings_ms": (result or {}).get("MetaData", {}).get("timings_ms", {})
+        }
+        with samples_lock:
+            samples.append(sample)
+
+    interval = 1.0 / rps
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="load") as executor:
+        for i, request_data in enumerate(requests):
+            # Open loop: send on schedule regardless of how many responses are outstanding
+            delay = started + i * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, request_data)
+    return samples, time.perf_counter() - started
+
+def build_report(samples, wall_seconds, target_rps):
+    """Throughput, error count and latency percentiles overall and per stage"""
+    stage_values = {}
+    for sample in samples:
+        for name, value in sample["timings_ms"].items():
+            stage_values.setdefault(stage_label(name), []).append(value)
+    return {
+        "target_rps": target_rps,
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if not sample["ok"]),
+        "wall_seconds": wall_seconds,
+        "throughput_rps": len(samples) / wall_seconds if wall_seconds else 0.0,
+        "latency_ms": summarize([sample["latency_ms"] for sample in samples]),
+        "stages_ms": {stage: summarize(values) for stage, values in sorted(stage_values.items())}
+    }
+
+def print_report(report):
+    print(f"\nRequests: {report['requests']}  errors: {report['errors']}  "
+          f"throughput: {report['throughput_rps']:.1f} req/s (target {report['target_rps']})")
+    print(f"{'stage':<32}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = [("end-to-end (client)", report["latency_ms"])] + list(report["stages_ms"].items())
+    for name, stats in rows:
+        if not stats.get("count"):
+            continue
+        print(f"{name:<32}{stats['count']:>8}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline load benchmark for /receive")
+    parser.add_argument("--rps", type=float, default=10, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load to generate")
+    parser.add_argument("--attendees", type=int, default=3, help="attendees per request")
+    parser.add_argument("--events-per-day", type=int, default=4, help="synthetic events per attendee per weekday")
+    parser.add_argument("--calendar-latency-ms", type=float, default=0, help="simulated Calendar API latency")
+    parser.add_argument("--llm-latency-ms", type=float, default=200, help="mock vLLM base latency")
+    parser.add_argument("--llm-jitter-ms", type=float, default=0, help="mock vLLM latency jitter")
+    parser.add_argument("--per-token-ms", type=float, default=0, help="mock vLLM latency per completion token")
+    parser.add_argument("--llm-batch-size", type=int, default=0, help="micro-batch LLM calls (0: off)")
+    parser.add_argument("--llm-batch-wait-ms", type=float, default=10, help="max wait to fill an LLM batch")
+    parser.add_argument("--llm-stream", action="store_true", help="stream LLM replies with early exit")
+    parser.add_argument("--llm-trailing-text", action="store_true",
+                        help="mock vLLM appends an explanation after each JSON reply")
+    parser.add_argument("--url", help="load an already running /receive endpoint instead")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="client-side concurrency cap")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json-out", help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    url = args.url
+    if url is None:
+        mock = MockVLLMServer(latency_ms=args.llm_latency_ms, jitter_ms=args.llm_jitter_ms,
+                              per_token_ms=args.per_token_ms, seed=args.seed,
+                              trailing_text=TRAILING_TEXT if args.llm_trailing_text else "").start_in_thread()
+        calendar_manager = FakeCalendarManager(events_per_day=args.events_per_day,
+                                               api_latency_ms=args.calendar_latency_ms, seed=args.seed)
+        url, _ = start_app(mock.base_url, calendar_manager, args.llm_batch_size, args.llm_batch_wait_ms,
+                           args.llm_stream)
+
+    requests = make_requests(int(args.rps * args.duration), args.attendees, seed=args.seed)
+    print(f"Sending {len(requests)} requests to {url} at {args.rps} req/s")
+    samples, wall_seconds = run_load(url, requests, args.rps, args.max_in_flight)
+    report = build_report(samples, wall_seconds, args.rps)
+    print_report(report)
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
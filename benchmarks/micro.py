@@ -0,0 +1,211 @@
+import argparse
+import itertools
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+import timeit
+from datetime import datetime, timedelta
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_calendar import FakeCalendarManager
+from utils.intervals import IntervalSet, IST
+from utils.time_utils import parse_datetime_string
+
+# Micro-benchmarks for the CPU hot paths of the scheduling core, stdlib timeit style:
+#   python benchmarks/micro.py                 # full grid, appended to the history
+#   python benchmarks/micro.py --quick -k score
+# Each run is appended to benchmarks/results/micro_history.jsonl and compared with the
+# previous run; cases slower by more than --threshold are reported as regressions.
+
+HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "micro_history.jsonl")
+WINDOW_START = datetime(2025, 7, 21, tzinfo=IST)
+
+ATTENDEES = (1, 10, 50, 200)
+EVENTS_PER_ATTENDEE = (0, 50, 500)
+WINDOW_DAYS = (1, 7, 30)
+QUICK_GRID = {"attendees": (1, 50), "events": (0, 50), "window": (1, 7)}
+
+DATETIME_PREF = {
+    'duration_mins': 30,
+    'urgency': 'normal',
+    'preferred_time': '10:00',
+    'is_specific_time': False,
+    'day_of_week': 'wednesday',
+    'time_range': '09:00-12:00'
+}
+REQUEST_DATETIME = "21-07-2025T09:00:00"
+
+def synthetic_attendee_events(attendees, events, window_days, seed=0):
+    """attendee_events in the scheduler's output format, spread over the window"""
+    rng = random.Random(seed)
+    window_minutes = window_days * 24 * 60
+    attendee_events = []
+    for i in range(attendees):
+        attendee = []
+        for _ in range(events):
+            start = WINDOW_START + timedelta(minutes=rng.randrange(0, window_minutes, 15))
+            end = start + timedelta(minutes=rng.choice([15, 30, 60, 90]))
+            attendee.append({"StartTime": start.isoformat(), "EndTime": end.isoformat()})
+        attendee_events.append({"email": f"user{i:03d}@bench.local", "events": attendee})
+    return attendee_events
+
+class Case:
+    """Prepared inputs for one (attendees, events, window) point, shared by all benchmarks"""
+
+    def __init__(self, calendar_manager, scheduler, attendees, events, window_days):
+        self.calendar_manager = calendar_manager
+        self.scheduler = scheduler
+        self.attendees = attendees
+        self.events = events
+        self.window_days = window_days
+        self.search_start = WINDOW_START.isoformat()
+        self.search_end = (WINDOW_START + timedelta(days=window_days)).isoformat()
+        self.attendee_events = synthetic_attendee_events(attendees, events, window_days)
+
+        busy = IntervalSet()
+        for attendee in self.attendee_events:
+            busy.extend(IntervalSet.from_events(attendee["events"]))
+        self.busy = busy
+        self.merged_busy = busy.merged()
+        self.free_slots = calendar_manager.find_free_slots(self.merged_busy, self.search_start, self.search_end, 30)
+        self.suitable_slots = scheduler.filter_suitable_slots(self.free_slots, 30, DATETIME_PREF, "")
+        self.datetime_strings = [event["StartTime"] for attendee in self.attendee_events
+                                 for event in attendee["events"]][:1000] or [REQUEST_DATETIME]
+
+# name -> (dimensions the benchmark depends on, statement over a Case)
+BENCHMARKS = {
+    "merge_overlapping_times": (
+        ("attendees", "events", "window"),
+        lambda case: case.calendar_manager.merge_overlapping_times(case.busy)
+    ),
+    "get_common_free_intervals": (
+        ("attendees", "events", "window"),
+        lambda case: case.calendar_manager.get_common_free_intervals(
+            case.attendee_events, case.search_start, case.search_end, 30)
+    ),
+    "find_free_slots": (
+        ("attendees", "events", "window"),
+        lambda case: case.calendar_manager.find_free_slots(case.merged_busy, case.search_start, case.search_end, 30)
+    ),
+    "filter_suitable_slots": (
+        ("attendees", "events", "window"),
+        lambda case: case.scheduler.filter_suitable_slots(case.free_slots, 30, DATETIME_PREF, "")
+    ),
+    "score_slots": (
+        ("attendees", "events", "window"),
+        lambda case: case.scheduler.score_slots(case.suitable_slots, DATETIME_PREF, REQUEST_DATETIME, top_k=5)
+    ),
+    "parse_datetime_string": (
+        ("events",),
+        lambda case: [parse_datetime_string(value) for value in case.datetime_strings]
+    ),
+}
+
+def case_points(dimensions, grid):
+    """Parameter points for a benchmark; unused dimensions are pinned to one value"""
+    values = [grid[name] if name in dimensions else grid[name][-1:] for name in ("attendees", "events", "window")]
+    return list(itertools.product(*values))
+
+def time_call(fn, repeat=5):
+    """Seconds per call: timeit autorange picks the loop count, then best and median of `repeat`"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    runs = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+    return {"best": min(runs), "median": statistics.median(runs), "loops": number}
+
+def run_suite(grid, pattern=None, repeat=5):
+    """Run every matching benchmark over the grid; returns {case id: timing}"""
+    from src.meeting_scheduler import MeetingScheduler
+
+    calendar_manager = FakeCalendarManager()
+    scheduler = MeetingScheduler(calendar_manager=calendar_manager, prefetch_days=0)
+    cases = {}
+    results = {}
+    try:
+        for name, (dimensions, statement) in BENCHMARKS.items():
+            if pattern and pattern not in name:
+                continue
+            for attendees, events, window in case_points(dimensions, grid):
+                key = (attendees, events, window)
+                if key not in cases:
+                    cases[key] = Case(calendar_manager, scheduler, attendees, events, window)
+                case = cases[key]
+                case_id = f"{name}[a={attendees},e={events},w={window}]"
+                results[case_id] = time_call(lambda: statement(case), repeat=repeat)
+                print(f"{case_id:<58}{results[case_id]['best'] * 1e6:>14.1f} us")
+    finally:
+        scheduler.close()
+    return results
+
+def git_commit():
+    """Short hash of the checked-out commit, recorded with each run"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip() or None
+    except OSError:
+        return None
+
+def load_history(path):
+    """Past runs, oldest first"""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def append_history(path, results):
+    """Append one run with enough context (commit, interpreter, machine) to compare later"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    entry = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results
+    }
+    with open(path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+    return entry
+
+def compare(previous, results, threshold):
+    """Cases whose best time grew by more than threshold (a fraction) since `previous`"""
+    regressions = []
+    for case_id, timing in results.items():
+        before = previous["results"].get(case_id)
+        if not before:
+            continue
+        change = timing["best"] / before["best"] - 1
+        if change > threshold:
+            regressions.append((case_id, before["best"], timing["best"], change))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the scheduling core")
+    parser.add_argument("-k", dest="pattern", help="only run benchmarks whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="small parameter grid for a fast check")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats per case")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown fraction reported as a regression")
+    parser.add_argument("--history", default=HISTORY_PATH, help="JSONL file of past runs")
+    parser.add_argument("--no-save", action="store_true", help="do not append this run to the history")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 if any case regressed")
+    args = parser.parse_args()
+
+    grid = QUICK_GRID if args.quick else {"attendees": ATTENDEES, "events": EVENTS_PER_ATTENDEE, "window": WINDOW_DAYS}
+    history = load_history(args.history)
+    results = run_suite(grid, args.pattern, args.repeat)
+
+    regressions = compare(history[-1], results, args.threshold) if history else []
+    if history:
+        print(f"\nCompared with run {history[-1].get('commit')} at {history[-1]['timestamp']}:")
+        for case_id, before, after, change in regressions:
+            print(f"  REGRESSION {case_id}: {before * 1e6:.1f} us -> {after * 1e6:.1f} us (+{change:.0%})")
+        if not regressions:
+            print(f"  no case slower by more than {args.threshold:.0%}")
+    if not args.no_save:
+        append_history(args.history, results)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
@@ -0,0 +1,194 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Canned replies for the two prompts the scheduler sends
+EXTRACTION_REPLY = {
+    "participants": "",
+    "duration_mins": 30,
+    "time_constraints": "next week",
+    "urgency": "normal",
+    "preferred_date": None,
+    "preferred_time": None,
+    "is_specific_time": False,
+    "day_of_week": None,
+    "time_range": None,
+    "is_today": False,
+    "is_tomorrow": False
+}
+SUGGESTION_REPLY = {"selected_slot_number": 1, "reason": "Earliest slot that fits the preferences"}
+# Explanation a chat model tends to append after the JSON object
+TRAILING_TEXT = " I chose these values because they best match the request in the email."
+
+def canned_reply(prompt):
+    """Pick the canned JSON reply for a scheduler prompt"""
+    if "selected_slot_number" in prompt:
+        return json.dumps(SUGGESTION_REPLY)
+    return json.dumps(EXTRACTION_REPLY)
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), enough for usage accounting"""
+    return max(1, len(text) // 4)
+
+def split_tokens(text):
+    """Pseudo-tokens of ~4 characters for streaming"""
+    return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+class MockVLLMHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible /v1/chat/completions and /v1/completions with simulated latency"""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path in ("/health", "/v1/health"):
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/v1/models":
+            self._send_json(200, {"object": "list", "data": [{"id": self.server.model, "object": "model"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.endswith("/chat/completions"):
+            prompts = ["\n".join(m.get("content", "") for m in request.get("messages", []))]
+        elif self.path.endswith("/completions"):
+            prompt = request.get("prompt", "")
+            prompts = prompt if isinstance(prompt, list) else [prompt]
+        else:
+            self._send_json(404, {"error": "not found"})
+            return
+
+        replies = [canned_reply(prompt) + self.server.trailing_text for prompt in prompts]
+        if request.get("stream"):
+            self._stream(request, replies)
+            return
+        completion_tokens = sum(estimate_tokens(reply) for reply in replies)
+        self.server.simulate_latency(completion_tokens)
+
+        self.server.count_request()
+        usage = {
+            "prompt_tokens": sum(estimate_tokens(prompt) for prompt in prompts),
+            "completion_tokens": completion_tokens
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        if self.path.endswith("/chat/completions"):
+            choices = [{"index": 0, "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": replies[0]}}]
+            kind = "chat.completion"
+        else:
+            choices = [{"index": i, "finish_reason": "stop", "text": reply} for i, reply in enumerate(replies)]
+            kind = "text_completion"
+        self._send_json(200, {
+            "id": f"mock-{time.monotonic_ns()}",
+            "object": kind,
+            "created": int(time.time()),
+            "model": request.get("model", self.server.model),
+            "choices": choices,
+            "usage": usage
+        })
+
+    def _stream(self, request, replies):
+        """Server-sent events, one pseudo-token per chunk; stops when the client hangs up"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        chat = self.path.endswith("/chat/completions")
+        kind = "chat.completion.chunk" if chat else "text_completion"
+        self.server.simulate_latency(0)
+        served = 0
+        try:
+            for index, reply in enumerate(replies):
+                pieces = split_tokens(reply)
+                for i, piece in enumerate(pieces):
+                    finish_reason = "stop" if i == len(pieces) - 1 else None
+                    choice = {"index": index, "finish_reason": finish_reason}
+                    if chat:
+                        choice["delta"] = {"content": piece}
+                    else:
+                        choice["text"] = piece
+                    chunk = {"id": f"mock-{time.monotonic_ns()}", "object": kind, "created": int(time.time()),
+                             "model": request.get("model", self.server.model), "choices": [choice]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    served += 1
+                    if self.server.per_token_ms:
+                        time.sleep(self.server.per_token_ms / 1000)
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.server.count_request(served)
+
+class MockVLLMServer(ThreadingHTTPServer):
+    """Threaded stub of the vLLM OpenAI server
+
+    Each response waits latency_ms (+/- jitter_ms) plus per_token_ms per completion
+    token, so prefill and decode costs can be approximated without a GPU. Streamed
+    requests pay per_token_ms per chunk actually sent; trailing_text is appended to
+    every reply to imitate a model that keeps talking after the JSON.
+    """
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=200, jitter_ms=0, per_token_ms=0,
+                 model="mock-deepseek-llm-7b-chat", seed=0, trailing_text=""):
+        super().__init__((host, port), MockVLLMHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.per_token_ms = per_token_ms
+        self.model = model
+        self.trailing_text = trailing_text
+        self.requests_served = 0
+        self.tokens_streamed = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def simulate_latency(self, completion_tokens):
+        with self._lock:
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        delay_ms = max(0, self.latency_ms + jitter) + self.per_token_ms * completion_tokens
+        time.sleep(delay_ms / 1000)
+
+    def count_request(self, tokens_streamed=0):
+        with self._lock:
+            self.requests_served += 1
+            self.tokens_streamed += tokens_streamed
+
+    def start_in_thread(self):
+        """Serve from a daemon thread and return self"""
+        threading.Thread(target=self.serve_forever, daemon=True, name="mock-vllm").start()
+        return self
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock of the vLLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--latency-ms", type=float, default=200, help="base latency per completion")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="uniform +/- jitter on the base latency")
+    parser.add_argument("--per-token-ms", type=float, default=0, help="extra latency per completion token")
+    parser.add_argument("--trailing-text", action="store_true", help="append an explanation after each JSON reply")
+    args = parser.parse_args()
+
+    server = MockVLLMServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.per_token_ms,
+                            trailing_text=TRAILING_TEXT if args.trailing_text else "")
+    print(f"Mock vLLM serving at {server.base_url}")
+    server.serve_forever()
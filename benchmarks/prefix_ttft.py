@@ -0,0 +1,123 @@
+import argparse
+import json
+import random
+import time
+import urllib.request
+from datetime import datetime, timedelta
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI
+
+from benchmarks.common import make_requests, summarize
+from src.prompts import MEETING_DETAILS_PROMPT, SYSTEM_PROMPT, TokenCounter
+
+# Time-to-first-token of the extraction prompt in two layouts against a real vLLM server:
+#   shared_prefix: system prompt + fixed instructions first, request data last (what the agent sends)
+#   data_first:    request data first, then the same instructions (the old layout)
+# Run it once against a server started with --enable-prefix-caching (start_vllm.sh) and
+# once without; with caching on, shared_prefix only prefills the per-request tail.
+#   python benchmarks/prefix_ttft.py --requests 50
+
+def shared_prefix_messages(counter, request_data):
+    return MEETING_DETAILS_PROMPT.render(
+        counter, request_datetime=request_data["Datetime"], email_content=request_data["EmailContent"]
+    )
+
+def data_first_messages(counter, request_data):
+    data = MEETING_DETAILS_PROMPT.render_data(
+        counter, request_datetime=request_data["Datetime"], email_content=request_data["EmailContent"]
+    )
+    return [{"role": "user", "content": f"{data}\n{SYSTEM_PROMPT}\n{MEETING_DETAILS_PROMPT.instructions}"}]
+
+TOPICS = ["the Q3 roadmap", "the launch checklist", "hiring for the data team", "the vendor contract",
+          "the incident review", "the design handoff", "budget planning", "the customer pilot"]
+
+def unique_requests(count, seed=0):
+    """Synthetic requests whose email body and Datetime never repeat
+
+    make_requests draws from a handful of templates with one fixed Datetime, so its prompts
+    repeat and data_first would get whole-prompt prefix cache hits; here every request
+    carries its own reference number, topic, sender and timestamp.
+    """
+    rng = random.Random(seed)
+    start = datetime(2025, 7, 21, 9, 0, 0)
+    requests = make_requests(count, 3, seed=seed)
+    for i, request_data in enumerate(requests):
+        sent_at = start + timedelta(minutes=37 * i, seconds=rng.randrange(60))
+        request_data["Datetime"] = sent_at.strftime("%d-%m-%YT%H:%M:%S")
+        request_data["EmailContent"] = (
+            f"Re: ticket #{10000 + i} ({rng.choice(TOPICS)}). {request_data['EmailContent']} "
+            f"I have {rng.randrange(2, 9)} points to cover. Thanks, sender {rng.randrange(1000, 9999)}"
+        )
+    return requests
+
+LAYOUTS = {"shared_prefix": shared_prefix_messages, "data_first": data_first_messages}
+
+def time_to_first_token(client, model, messages, max_tokens=16):
+    """Seconds from sending the request to the first streamed content token"""
+    started = time.perf_counter()
+    stream = client.chat.completions.create(
+        model=model, messages=messages, temperature=0.0, max_tokens=max_tokens, stream=True
+    )
+    ttft = None
+    try:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                ttft = time.perf_counter() - started
+                break
+    finally:
+        stream.close()
+    return ttft if ttft is not None else time.perf_counter() - started
+
+def prefix_cache_metrics(base_url):
+    """vLLM's prefix cache lines from its /metrics page, if it exposes any"""
+    metrics_url = base_url.rstrip("/").rsplit("/v1", 1)[0] + "/metrics"
+    try:
+        with urllib.request.urlopen(metrics_url, timeout=5) as response:
+            text = response.read().decode("utf-8")
+    except Exception:
+        return []
+    return [line for line in text.splitlines() if "prefix_cache" in line and not line.startswith("#")]
+
+def run(client, model, requests, seed=0):
+    """TTFT samples (ms) per layout; layouts alternate in random order to spread server noise"""
+    counter = TokenCounter.from_env()
+    rng = random.Random(seed)
+    samples = {name: [] for name in LAYOUTS}
+    for request_data in requests:
+        order = list(LAYOUTS)
+        rng.shuffle(order)
+        for name in order:
+            ttft = time_to_first_token(client, model, LAYOUTS[name](counter, request_data))
+            samples[name].append(ttft * 1000)
+    return samples
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TTFT of shared-prefix vs data-first prompt layouts")
+    parser.add_argument("--vllm-url", default="http://localhost:3000/v1")
+    parser.add_argument("--model", default="/home/user/Models/deepseek-ai/deepseek-llm-7b-chat")
+    parser.add_argument("--requests", type=int, default=50, help="synthetic requests per layout")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json-out", help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    client = OpenAI(api_key="NULL", base_url=args.vllm_url, max_retries=0)
+    # Prime the shared prefix the way the servers do at startup
+    client.chat.completions.create(model=args.model, messages=MEETING_DETAILS_PROMPT.prefix_messages(),
+                                   temperature=0.0, max_tokens=1)
+
+    samples = run(client, args.model, unique_requests(args.requests, seed=args.seed), args.seed)
+    report = {name: summarize(values) for name, values in samples.items()}
+    print(f"{'layout':<16}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    for name, stats in report.items():
+        print(f"{name:<16}{stats['count']:>8}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['mean']:>10.1f}")
+    if report["data_first"]["p50"]:
+        change = report["shared_prefix"]["p50"] / report["data_first"]["p50"] - 1
+        print(f"shared_prefix p50 TTFT vs data_first: {change:+.0%}")
+    for line in prefix_cache_metrics(args.vllm_url):
+        print(line)
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
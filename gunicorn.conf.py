@@ -0,0 +1,37 @@
+# Gunicorn configuration for the AI Scheduling Assistant
+#   gunicorn -c gunicorn.conf.py main_submission:app
+# or
+#   python main_submission.py --production --workers 4 --threads 8
+import os
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '5001')}"
+
+# Pre-fork workers; each builds its own MeetingScheduler after fork
+workers = int(os.environ.get("SCHEDULER_WORKERS", 4))
+# Requests mostly wait on vLLM and the Calendar API, so each worker runs a thread pool
+worker_class = "gthread"
+threads = int(os.environ.get("SCHEDULER_THREADS", 8))
+preload_app = False
+
+# Grader requests have a 10 second budget; give stuck requests a little more before killing
+timeout = int(os.environ.get("SCHEDULER_TIMEOUT", 30))
+# On SIGTERM, stop accepting connections and let in-flight requests finish
+graceful_timeout = int(os.environ.get("SCHEDULER_GRACEFUL_TIMEOUT", 20))
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("SCHEDULER_LOG_LEVEL", "info")
+
+def post_fork(server, worker):
+    """Build the worker's scheduler up front so the first request does not pay for it"""
+    import main_submission
+    # Also primes vLLM's prefix cache; only the first worker's warm-up does any prefill
+    main_submission.get_meeting_scheduler().warm_up()
+    server.log.info(f"Worker {worker.pid} initialised its meeting scheduler")
+
+def worker_exit(server, worker):
+    """Release the worker's scheduler and request history on graceful shutdown"""
+    import main_submission
+    main_submission.shutdown_meeting_scheduler()
+    main_submission.request_history.close()
@@ -23,6 +23,8 @@ python3 -c "import flask" 2>/dev/null && echo "   ✓ Flask installed" || echo "
 python3 -c "import openai" 2>/dev/null && echo "   ✓ OpenAI installed" || echo "   ❌ OpenAI missing"
 python3 -c "import google.auth" 2>/dev/null && echo "   ✓ Google Auth installed" || echo "   ❌ Google Auth missing"
 python3 -c "import vllm" 2>/dev/null && echo "   ✓ vLLM installed" || echo "   ❌ vLLM missing"
+# Only needed for the async server (async_submission.py)
+python3 -c "import quart, hypercorn" 2>/dev/null && echo "   ✓ Quart/Hypercorn installed" || echo "   ⚠️  Quart/Hypercorn missing, needed for async_submission.py (pip install quart hypercorn)"
 
 # Step 3: Check GPU status
 echo -e "\n2. Checking GPU status..."
@@ -1,26 +1,70 @@
-from flask import Flask, request, jsonify
-from threading import Thread
+from flask import Flask, Response, request, jsonify, stream_with_context
+from threading import Thread, Lock
+import argparse
 import json
+import logging
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from src.batch_runner import BatchRunner, parse_batch_payload
 from src.meeting_scheduler import MeetingScheduler
+from src.metrics import render_metrics
+from src.request_history import RequestHistory
+from utils.tracing import configure_logging
+
+# Per-request detail is logged at DEBUG; set LOG_LEVEL=DEBUG (or --debug) to see it
+configure_logging()
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-received_data = []
+# Bounded history of recent requests, queryable through /history. The buffer is per
+# worker; set HISTORY_SPILL_PATH to one sqlite file so /history sees every worker's requests
+request_history = RequestHistory.from_env()
+
+# Upper bound on requests a single /receive_batch call keeps in flight
+MAX_BATCH_CONCURRENCY = int(os.environ.get("MAX_BATCH_CONCURRENCY", 32))
+# Micro-batching of LLM calls across concurrent requests (off by default). Batches go to
+# /v1/completions with prompts in deepseek-llm-chat's template (src.prompts.render_chat_prompt),
+# so only enable it for that model; it takes precedence over LLM_STREAM
+LLM_BATCH_MAX_SIZE = int(os.environ.get("LLM_BATCH_MAX_SIZE", 0))
+LLM_BATCH_MAX_WAIT_MS = float(os.environ.get("LLM_BATCH_MAX_WAIT_MS", 10))
+# LLM_STREAM=1 streams un-batched LLM replies and stops at the end of their JSON object
+LLM_STREAM = os.environ.get("LLM_STREAM", "0") == "1"
+
+# The meeting scheduler is built lazily, once per process, so that pre-forked
+# workers each own their clients, thread pools and caches
+meeting_scheduler = None
+_scheduler_lock = Lock()
+
+def get_meeting_scheduler():
+    """Return this process's meeting scheduler, creating it on first use"""
+    global meeting_scheduler
+    if meeting_scheduler is None:
+        with _scheduler_lock:
+            if meeting_scheduler is None:
+                meeting_scheduler = MeetingScheduler(
+                    llm_batch_max_size=LLM_BATCH_MAX_SIZE, llm_batch_max_wait_ms=LLM_BATCH_MAX_WAIT_MS,
+                    llm_stream=LLM_STREAM
+                )
+    return meeting_scheduler
 
-# Initialize the meeting scheduler
-meeting_scheduler = MeetingScheduler()
+def shutdown_meeting_scheduler():
+    """Release this process's scheduler resources on shutdown"""
+    global meeting_scheduler
+    with _scheduler_lock:
+        if meeting_scheduler is not None:
+            meeting_scheduler.close()
+            meeting_scheduler = None
 
 def your_meeting_assistant(data):
     """Main function called by the submission system"""
     try:
         # Use the meeting scheduler to process the request
-        result = meeting_scheduler.schedule_meeting(data)
+        result = get_meeting_scheduler().schedule_meeting(data)
         return result
     except Exception as e:
-        print(f"Error in your_meeting_assistant: {e}")
+        logger.exception("Error in your_meeting_assistant: %s", e)
         # Return minimal valid response
         return {
             "Request_id": data.get("Request_id", ""),
@@ -41,24 +85,59 @@ def receive():
     """Endpoint to receive meeting requests"""
     try:
         data = request.get_json()
-        print(f"\n Received: {json.dumps(data, indent=2)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received: %s", json.dumps(data, indent=2))
         
         # Process the meeting request
         new_data = your_meeting_assistant(data)
         
         # Store for debugging
-        received_data.append({
-            "input": data,
-            "output": new_data
-        })
+        request_history.record(data, new_data)
         
-        print(f"\n\n\n Sending:\n {json.dumps(new_data, indent=2)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending: %s", json.dumps(new_data, indent=2))
         return jsonify(new_data)
     
     except Exception as e:
-        print(f"Error in receive endpoint: {e}")
+        logger.exception("Error in receive endpoint: %s", e)
         return jsonify({"error": str(e)}), 500
 
+@app.route('/receive_batch', methods=['POST'])
+def receive_batch():
+    """Endpoint to receive many meeting requests (JSON array or NDJSON); streams NDJSON results as they finish"""
+    try:
+        batch = parse_batch_payload(request.get_data(as_text=True))
+    except ValueError as e:
+        return jsonify({"error": f"invalid batch: {e}"}), 400
+    
+    concurrency = min(request.args.get('concurrency', default=8, type=int), MAX_BATCH_CONCURRENCY)
+    runner = BatchRunner(get_meeting_scheduler(), concurrency)
+    logger.debug("Received batch of %d requests (concurrency %d)", len(batch), runner.concurrency)
+    
+    def generate():
+        for data, result in runner.run(batch):
+            request_history.record(data, result)
+            yield json.dumps(result) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/history', methods=['GET'])
+def history():
+    """Look up recent requests by ?request_id=..., or list the latest ?limit=N"""
+    request_id = request.args.get('request_id')
+    if request_id:
+        entries = request_history.find(request_id)
+        if not entries:
+            return jsonify({"error": f"no history for request_id {request_id}"}), 404
+    else:
+        entries = request_history.recent(request.args.get('limit', default=20, type=int))
+    return jsonify({"entries": entries, "stats": request_history.stats()})
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics for this process"""
+    return Response(render_metrics(meeting_scheduler), mimetype='text/plain; version=0.0.4')
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -69,25 +148,60 @@ def test():
     """Test endpoint to verify server is running"""
     return jsonify({
         "message": "AI Scheduling Assistant is running",
-        "endpoints": ["/receive", "/health", "/test"],
-        "total_requests_processed": len(received_data)
+        "endpoints": ["/receive", "/receive_batch", "/history", "/metrics", "/health", "/test"],
+        "total_requests_processed": request_history.total_recorded
     })
 
-def run_flask():
-    """Run the Flask server"""
-    app.run(host='0.0.0.0', port=5001, debug=True)
+def run_flask(host='0.0.0.0', port=5001, debug=False):
+    """Run the Flask development server"""
+    get_meeting_scheduler().warm_up()
+    app.run(host=host, port=port, debug=debug, threaded=True)
+
+def run_production(host='0.0.0.0', port=5001, workers=None, threads=None):
+    """Run under gunicorn: pre-forked workers, each with its own scheduler and a thread pool"""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    command = [
+        sys.executable, "-m", "gunicorn",
+        "--config", os.path.join(base_dir, "gunicorn.conf.py"),
+        "--chdir", base_dir,
+        "--bind", f"{host}:{port}"
+    ]
+    if workers:
+        command += ["--workers", str(workers)]
+    if threads:
+        command += ["--threads", str(threads)]
+    command.append("main_submission:app")
+    # Replace this process so gunicorn's master receives signals directly
+    os.execv(sys.executable, command)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI Scheduling Assistant server")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 5001)))
+    parser.add_argument("--production", action="store_true",
+                        help="serve with gunicorn pre-fork workers instead of the dev server")
+    parser.add_argument("--workers", type=int, help="gunicorn worker processes (production only)")
+    parser.add_argument("--threads", type=int, help="threads per gunicorn worker (production only)")
+    parser.add_argument("--debug", action="store_true",
+                        help="enable the Flask debugger and reloader, and DEBUG logging")
+    args = parser.parse_args()
+    if args.debug:
+        configure_logging(debug=True)
+    
     print("Starting AI Scheduling Assistant Server...")
-    print("Server will be available at http://0.0.0.0:5001")
+    print(f"Server will be available at http://{args.host}:{args.port}")
     print("Endpoints:")
     print("  - POST /receive - Submit meeting requests")
+    print("  - POST /receive_batch - Submit a JSON array or NDJSON of requests")
+    print("  - GET /history?request_id=... - Look up recent requests")
+    print("  - GET /metrics - Prometheus metrics")
     print("  - GET /health - Health check")
     print("  - GET /test - Test server status")
     
-    # For production, run directly
-    # For development/testing, can use threading
-    run_flask()
+    if args.production:
+        run_production(args.host, args.port, args.workers, args.threads)
+    else:
+        run_flask(args.host, args.port, args.debug)
     
     # Alternative: Run in background thread
     # Thread(target=run_flask, daemon=True).start()
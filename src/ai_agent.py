@@ -1,189 +1,321 @@
 import json
-from openai import OpenAI
+import logging
+from functools import partial
+from openai import OpenAI, AsyncOpenAI
 from datetime import datetime, timedelta
 import re
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.llm_batcher import AsyncCompletionBatcher, CompletionBatcher
+from src.llm_schemas import (
+    MAX_SUGGESTED_SLOTS, MEETING_DETAILS_MAX_TOKENS, MEETING_DETAILS_SCHEMA, SLOT_SUGGESTION_MAX_TOKENS,
+    MeetingDetails, SlotSuggestion, slot_suggestion_schema
+)
+from src.llm_stream import aread_json_object, read_json_object
+from src.llm_transport import shared_async_http_client, shared_http_client, shared_transport
+from src.metrics import FALLBACKS, LLM_CACHE_LOOKUPS, record_usage
+from src.prompts import MEETING_DETAILS_PROMPT, SLOT_SUGGESTION_PROMPT, TEMPLATES, TokenCounter
+from utils.steps import arun_steps, run_steps
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Keys returned by parse_email and extract_datetime_preference respectively
+MEETING_DETAIL_KEYS = ('participants', 'duration_mins', 'time_constraints', 'urgency')
+DATETIME_PREFERENCE_KEYS = (
+    'preferred_date', 'preferred_time', 'is_specific_time', 'day_of_week',
+    'time_range', 'is_today', 'is_tomorrow', 'urgency'
+)
+
+def default_meeting_details():
+    """Default extraction result used when the model output is unusable"""
+    return MeetingDetails().to_dict()
 
 class AISchedulingAgent:
-    def __init__(self, base_url="http://localhost:3000/v1", model_path="/home/user/Models/deepseek-ai/deepseek-llm-7b-chat"):
+    def __init__(self, base_url="http://localhost:3000/v1", model_path="/home/user/Models/deepseek-ai/deepseek-llm-7b-chat",
+                 cache=None, transport=None, structured_output="guided_json", token_counter=None,
+                 batch_max_size=0, batch_max_wait_ms=10, stream=False):
         self.base_url = base_url
         self.model_path = model_path
-        self.client = OpenAI(api_key="NULL", base_url=base_url, timeout=None, max_retries=0)
+        # Retries and timeouts are handled by the transport, over the process-wide keep-alive pool
+        self.client = self._make_client()
+        self.transport = transport if transport is not None else shared_transport()
+        # Optional response cache (see src.llm_cache.LLMResponseCache); any object with
+        # make_key/get/set works. Safe because every call uses temperature=0.0
+        self.cache = cache
+        # How replies are constrained to the JSON schemas in src.llm_schemas: "guided_json"
+        # (vLLM extra_body), "response_format" (OpenAI json_schema) or None for free text
+        self.structured_output = structured_output
+        # Sizes prompts against the template budgets (see src.prompts)
+        self.token_counter = token_counter if token_counter is not None else TokenCounter.from_env()
+        # Stream un-batched replies and stop reading once the JSON object closes (src.llm_stream)
+        self.stream = stream
+        # With batch_max_size > 1, calls from concurrent requests are coalesced into batched
+        # /v1/completions requests (see src.llm_batcher)
+        self.batcher = self._make_batcher(batch_max_size, batch_max_wait_ms) if batch_max_size > 1 else None
     
-    def parse_email(self, email_content):
-        """Extract meeting details from email content"""
-        try:
-            print(f"[AI Agent] Parsing email: {email_content[:100]}...")
-            response = self.client.chat.completions.create(
-                model=self.model_path,
-                temperature=0.0,
-                max_tokens=200,
-                messages=[{
-                    "role": "user",
-                    "content": f""".
-                    You are an AI Agent that helps in scheduling meetings.
-                    Extract the following information from the email:
-                    1. List of participant email addresses (comma-separated). EXACTLY AS GIVEN word-to-word. DON'T MAKE ANY CHANGE
-                    2. Meeting duration in minutes. CORRECTLY analyse the context and contents of the email and precisely provide the duration.
-                    Example: 1 hour = 60 mins, 2 hours = 120 mins, etc.
-                    3. Time constraints (e.g., 'next week', 'Thursday', 'Monday at 9:00 AM')
-                    4. Meeting urgency (normal/urgent). Properly identify terms like urgent, URGENT, do or die, IMP, important, ASAP, asap, and other variations which show that it is urgent and mark "urgent". For other cases mark as "normal"
-                    
-                    If participant names are given without email domains, append @amd.com
-                    STRICTLY Return ONLY valid JSON with keys: 'participants', 'duration_mins', 'time_constraints', 'urgency'
-                    
-                    Email: {email_content}
-                    """
-                }]
+    def _make_client(self):
+        return OpenAI(api_key="NULL", base_url=self.base_url, max_retries=0, http_client=shared_http_client())
+    
+    def _make_batcher(self, max_size, max_wait_ms):
+        return CompletionBatcher(self.client, self.model_path, self.transport, max_size, max_wait_ms)
+    
+    def close(self):
+        """Stop the batching dispatcher, if any"""
+        if self.batcher is not None:
+            self.batcher.close()
+    
+    def llm_available(self):
+        """False while the circuit is open or the request has no time left for a call"""
+        return self.transport.available()
+    
+    def _chat_steps(self, template, messages, max_tokens, schema=None):
+        """Steps of a chat completion for rendered template messages; returns the stripped reply text
+        
+        Shared by the sync and async agents (see utils.steps); only _complete differs.
+        """
+        cache_key, cached = self._cache_lookup(messages, max_tokens, schema)
+        if cached is not None:
+            return cached
+        content = yield partial(self._complete, template, messages, max_tokens, schema)
+        self._cache_store(cache_key, content)
+        return content
+    
+    def _complete(self, template, messages, max_tokens, schema=None):
+        """Send one completion to vLLM (batched, streamed or plain) and return its reply text"""
+        if self.batcher is not None:
+            return self.batcher.complete(
+                template, messages, max_tokens, self._structured_output_params(template, schema)
             )
-            
-            content = response.choices[0].message.content.strip()
-            print(f"[AI Agent] Raw response: {content}")
-            
-            # Try to extract JSON from the response
-            import re
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-                result = json.loads(json_str)
-                # Ensure duration_mins is an integer
-                if 'duration_mins' in result:
-                    result['duration_mins'] = int(result['duration_mins'])
-                print(f"[AI Agent] Parsed result: {result}")
-                return result
-            else:
-                # Fallback if no JSON found
-                print(f"Warning: No JSON in AI response: {content}")
-                return {
-                    'participants': '',
-                    'duration_mins': 30,
-                    'time_constraints': '',
-                    'urgency': 'normal'
-                }
-                
+        if self.stream:
+            stream = self.transport.call(
+                self.client.chat.completions.create, stream=True,
+                **self._chat_request(template, messages, max_tokens, schema)
+            )
+            return read_json_object(stream, template, self.transport.breaker)
+        response = self.transport.call(
+            self.client.chat.completions.create, **self._chat_request(template, messages, max_tokens, schema)
+        )
+        record_usage(response, template)
+        return response.choices[0].message.content.strip()
+    
+    def warm_up(self, timeout=10.0):
+        """Prefill each template's static prefix once so vLLM's prefix cache holds it
+
+        Bypasses the transport so a server that is still starting does not trip the breaker.
+        """
+        return run_steps(self._warm_up_steps(timeout))
+    
+    def _warm_up_steps(self, timeout):
+        for template in TEMPLATES:
+            try:
+                yield partial(self.client.chat.completions.create, **self._warm_up_request(template, timeout))
+            except Exception as e:
+                logger.info("Prefix cache warm-up for %s failed: %s", template.name, e)
+                return False
+        logger.info("Prefix cache warmed for %d prompt templates", len(TEMPLATES))
+        return True
+    
+    def _warm_up_request(self, template, timeout):
+        """Request kwargs that prefill a template's static prefix and decode one token"""
+        return dict(model=self.model_path, temperature=0.0, max_tokens=1,
+                    messages=template.prefix_messages(), timeout=timeout)
+    
+    def _chat_request(self, template, messages, max_tokens, schema=None):
+        """Chat completion kwargs for rendered template messages"""
+        return dict(model=self.model_path, temperature=0.0, max_tokens=max_tokens, messages=messages,
+                    **self._structured_output_params(template, schema))
+    
+    def _structured_output_params(self, schema_name, schema):
+        """Request kwargs that make vLLM decode a reply matching schema"""
+        if schema is None or not self.structured_output:
+            return {}
+        if self.structured_output == "response_format":
+            return {"response_format": {"type": "json_schema", "json_schema": {"name": schema_name, "schema": schema}}}
+        return {"extra_body": {"guided_json": schema}}
+    
+    def _cache_lookup(self, messages, max_tokens, schema=None):
+        """Return (cache_key, cached reply or None)"""
+        if self.cache is None:
+            return None, None
+        cache_key = self.cache.make_key(self.model_path, messages, max_tokens, temperature=0.0,
+                                        schema=schema if self.structured_output else None)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Cache hit")
+        LLM_CACHE_LOOKUPS.labels("miss" if cached is None else "hit").inc()
+        return cache_key, cached
+    
+    def _cache_store(self, cache_key, content):
+        """Remember a reply under the key from _cache_lookup, if it is a usable JSON object
+
+        A truncated or malformed generation is not cached, so the next request retries it.
+        """
+        if cache_key is None:
+            return
+        try:
+            parsed = self._parse_json(content)
+        except ValueError:
+            parsed = None
+        if isinstance(parsed, dict):
+            self.cache.set(cache_key, content)
+    
+    def extract_meeting_details(self, email_content, request_datetime=None, fallback=None):
+        """Extract meeting details and datetime preferences in a single LLM call
+
+        If the call fails, returns `fallback` (e.g. a low-confidence rule extraction) or the defaults.
+        """
+        return run_steps(self._extraction_steps(email_content, request_datetime, fallback))
+    
+    def _extraction_steps(self, email_content, request_datetime, fallback):
+        try:
+            logger.debug("Extracting meeting details from: %.100s...", email_content)
+            with span("llm.parse_email"):
+                content = yield from self._chat_steps(
+                    MEETING_DETAILS_PROMPT.name, self._meeting_details_prompt(email_content, request_datetime),
+                    MEETING_DETAILS_MAX_TOKENS, MEETING_DETAILS_SCHEMA
+                )
+            return self._parse_meeting_details(content)
         except Exception as e:
-            print(f"Error in parse_email: {e}")
-            # Return default values
-            return {
-                'participants': '',
-                'duration_mins': 30,
-                'time_constraints': '',
-                'urgency': 'normal'
-            }
+            logger.warning("Error in extract_meeting_details: %s", e)
+            if fallback is not None:
+                FALLBACKS.labels("extraction_rules").inc()
+                return dict(fallback)
+            FALLBACKS.labels("extraction_defaults").inc()
+            return default_meeting_details()
     
-    def extract_datetime_preference(self, email_content, request_datetime):
-        """Extract specific datetime preferences from email"""
+    def _meeting_details_prompt(self, email_content, request_datetime):
+        """Messages for the combined meeting details extraction"""
+        return MEETING_DETAILS_PROMPT.render(
+            self.token_counter, request_datetime=request_datetime or 'unknown', email_content=email_content
+        )
+    
+    def _parse_json(self, content):
+        """Decode a JSON object reply; the regex search only matters without guided decoding"""
         try:
-            print(f"[AI Agent] Extracting datetime preference from: {email_content[:100]}...")
-            response = self.client.chat.completions.create(
-                model=self.model_path,
-                temperature=0.0,
-                max_tokens=200,
-                messages=[{
-                    "role": "user",
-                    "content": f"""
-                    Current datetime: {request_datetime}
-                    
-                    Extract the preferred meeting date and time from this email.
-                    Consider phrases like:
-                    - "next Thursday" 
-                    - "Monday at 9:00 AM"
-                    - "Tuesday at 11:00 A.M"
-                    - "tomorrow"
-                    - "ASAP" or "urgent" (means schedule at earliest available)
-                    
-                    For "Monday at 9:00 AM", extract:
-                    - Day: Monday (next occurrence from current date)
-                    - Time: 09:00 (24-hour format)
-                    
-                    Return ONLY JSON with:
-                    - preferred_date: YYYY-MM-DD format (null if not specific)
-                    - preferred_time: HH:MM format in 24-hour (e.g., "09:00" for 9 AM)
-                    - is_specific_time: true if specific time like "9:00 AM" mentioned
-                    - day_of_week: monday/tuesday/etc if mentioned (lowercase)
-                    - urgency: urgent/normal based on keywords like URGENT, ASAP, promptly
-                    
-                    Email: {email_content}
-                    """
-                }]
-            )
-            
-            content = response.choices[0].message.content.strip()
-            print(f"[AI Agent] Datetime extraction response: {content}")
-            
-            # Extract JSON
-            import re
+            return json.loads(content)
+        except ValueError:
             json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group(0))
-                print(f"[AI Agent] Extracted datetime preferences: {result}")
-                return result
-            else:
-                print(f"[AI Agent] No JSON found in datetime extraction")
-                return {'preferred_date': None, 'preferred_time': None, 'is_specific_time': False}
-                
-        except Exception as e:
-            print(f"Error in extract_datetime_preference: {e}")
-            return {'preferred_date': None, 'preferred_time': None, 'is_specific_time': False}
+            return json.loads(json_match.group(0)) if json_match else None
+    
+    def _parse_meeting_details(self, content):
+        """Parse the extraction reply, falling back to defaults"""
+        logger.debug("Raw response: %s", content)
+        
+        parsed = self._parse_json(content)
+        if not isinstance(parsed, dict):
+            # Fallback if no JSON found
+            logger.warning("No JSON in AI response: %s", content)
+            FALLBACKS.labels("extraction_defaults").inc()
+            return default_meeting_details()
+        
+        result = MeetingDetails.from_dict(parsed).to_dict()
+        logger.debug("Extracted meeting details: %s", result)
+        return result
+    
+    def parse_email(self, email_content):
+        """Extract meeting details from email content"""
+        details = self.extract_meeting_details(email_content)
+        return {key: details[key] for key in MEETING_DETAIL_KEYS}
+    
+    def extract_datetime_preference(self, email_content, request_datetime):
+        """Extract specific datetime preferences from email"""
+        details = self.extract_meeting_details(email_content, request_datetime)
+        return {key: details[key] for key in DATETIME_PREFERENCE_KEYS}
     
     def suggest_meeting_time(self, available_slots, duration_mins, preferences=None):
         """Use AI to suggest the best meeting time from available slots"""
+        return run_steps(self._suggestion_steps(available_slots, duration_mins, preferences))
+    
+    def _suggestion_steps(self, available_slots, duration_mins, preferences):
         try:
             if not available_slots:
                 return {'selected_slot_number': 1, 'reason': 'No slots available'}
-                
-            slots_str = "\n".join([f"{i+1}. {slot['start']} to {slot['end']}" for i, slot in enumerate(available_slots[:10])])
-            
-            # Extract preference details
-            urgency = preferences.get('urgency', 'normal') if isinstance(preferences, dict) else 'normal'
-            time_constraints = preferences.get('time_constraints', '') if isinstance(preferences, dict) else str(preferences)
-            preferred_time = preferences.get('preferred_time', '') if isinstance(preferences, dict) else ''
-            email_content = preferences.get('email_content', '') if isinstance(preferences, dict) else ''
-            
-            prompt = f"""
-            You are an intelligent meeting scheduler. Select the BEST time slot based on the meeting request.
-            
-            Meeting Request: {email_content}
-            
-            Available slots:
-            {slots_str}
-            
-            Meeting details:
-            - Duration: {duration_mins} minutes
-            - Urgency: {urgency}
-            - Time constraints: {time_constraints}
-            - Preferred time: {preferred_time}
-            
-            Selection criteria:
-            1. For URGENT meetings: Choose the EARLIEST available slot
-            2. If specific time requested (e.g., "9:00 AM"): Choose slot matching that time
-            3. If specific day requested (e.g., "Monday"): Choose slot on that day
-            4. Consider business hours (9 AM - 6 PM)
-            5. Prefer morning slots (9-11 AM) for important meetings
-            6. Avoid lunch time (12-1 PM) unless necessary
-            
-            STRICTLY Return ONLY JSON with:
-            - selected_slot_number: (1-based index of best slot)
-            - reason: brief explanation of why this slot was chosen
-            """
-            
-            response = self.client.chat.completions.create(
-                model=self.model_path,
-                temperature=0.0,
-                max_tokens=100,
-                messages=[{"role": "user", "content": prompt}]
-            )
             
-            content = response.choices[0].message.content.strip()
-            
-            # Extract JSON
-            import re
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group(0))
-            else:
-                # Default to first slot
-                return {'selected_slot_number': 1, 'reason': 'Selected first available slot'}
+            with span("llm.suggest"):
+                content = yield from self._chat_steps(
+                    SLOT_SUGGESTION_PROMPT.name, self._suggest_prompt(available_slots, duration_mins, preferences),
+                    SLOT_SUGGESTION_MAX_TOKENS, slot_suggestion_schema(min(len(available_slots), MAX_SUGGESTED_SLOTS))
+                )
+            return self._parse_suggestion(content)
                 
         except Exception as e:
-            print(f"Error in suggest_meeting_time: {e}")
-            return {'selected_slot_number': 1, 'reason': 'Error occurred, using first slot'}
\ No newline at end of file
+            logger.warning("Error in suggest_meeting_time: %s", e)
+            FALLBACKS.labels("suggestion_first_slot").inc()
+            return {'selected_slot_number': 1, 'reason': 'Error occurred, using first slot'}
+    
+    def _suggest_prompt(self, available_slots, duration_mins, preferences):
+        """Messages asking the model to pick one of the ranked slots"""
+        slots_str = "\n".join([f"{i+1}. {slot['start']} to {slot['end']}" for i, slot in enumerate(available_slots[:MAX_SUGGESTED_SLOTS])])
+        
+        # Extract preference details
+        urgency = preferences.get('urgency', 'normal') if isinstance(preferences, dict) else 'normal'
+        time_constraints = preferences.get('time_constraints', '') if isinstance(preferences, dict) else str(preferences)
+        preferred_time = preferences.get('preferred_time', '') if isinstance(preferences, dict) else ''
+        email_content = preferences.get('email_content', '') if isinstance(preferences, dict) else ''
+        
+        return SLOT_SUGGESTION_PROMPT.render(
+            self.token_counter, email_content=email_content, duration_mins=duration_mins, urgency=urgency,
+            time_constraints=time_constraints or 'none', preferred_time=preferred_time or 'none', slots=slots_str
+        )
+    
+    def _parse_suggestion(self, content):
+        """Parse the slot selection reply, defaulting to the first slot"""
+        parsed = self._parse_json(content)
+        if isinstance(parsed, dict):
+            return SlotSuggestion.from_dict(parsed).to_dict()
+        # Default to first slot
+        return {'selected_slot_number': 1, 'reason': 'Selected first available slot'}
+
+
+class AsyncAISchedulingAgent(AISchedulingAgent):
+    """AISchedulingAgent on AsyncOpenAI, for use from an asyncio event loop"""
+    
+    def _make_client(self):
+        return AsyncOpenAI(api_key="NULL", base_url=self.base_url, max_retries=0,
+                           http_client=shared_async_http_client())
+    
+    def _make_batcher(self, max_size, max_wait_ms):
+        return AsyncCompletionBatcher(self.client, self.model_path, self.transport, max_size, max_wait_ms)
+    
+    async def warm_up(self, timeout=10.0):
+        """Prefill each template's static prefix once so vLLM's prefix cache holds it"""
+        return await arun_steps(self._warm_up_steps(timeout))
+    
+    async def _complete(self, template, messages, max_tokens, schema=None):
+        """Send one completion to vLLM (batched, streamed or plain) and return its reply text"""
+        if self.batcher is not None:
+            return await self.batcher.complete(
+                template, messages, max_tokens, self._structured_output_params(template, schema)
+            )
+        if self.stream:
+            stream = await self.transport.acall(
+                self.client.chat.completions.create, stream=True,
+                **self._chat_request(template, messages, max_tokens, schema)
+            )
+            return await aread_json_object(stream, template, self.transport.breaker)
+        response = await self.transport.acall(
+            self.client.chat.completions.create, **self._chat_request(template, messages, max_tokens, schema)
+        )
+        record_usage(response, template)
+        return response.choices[0].message.content.strip()
+    
+    async def extract_meeting_details(self, email_content, request_datetime=None, fallback=None):
+        """Extract meeting details and datetime preferences in a single LLM call"""
+        return await arun_steps(self._extraction_steps(email_content, request_datetime, fallback))
+    
+    async def parse_email(self, email_content):
+        """Extract meeting details from email content"""
+        details = await self.extract_meeting_details(email_content)
+        return {key: details[key] for key in MEETING_DETAIL_KEYS}
+    
+    async def extract_datetime_preference(self, email_content, request_datetime):
+        """Extract specific datetime preferences from email"""
+        details = await self.extract_meeting_details(email_content, request_datetime)
+        return {key: details[key] for key in DATETIME_PREFERENCE_KEYS}
+    
+    async def suggest_meeting_time(self, available_slots, duration_mins, preferences=None):
+        """Use AI to suggest the best meeting time from available slots"""
+        return await arun_steps(self._suggestion_steps(available_slots, duration_mins, preferences))
@@ -0,0 +1,46 @@
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_agent import AsyncAISchedulingAgent
+from src.meeting_scheduler import MeetingScheduler
+from utils.steps import arun_steps
+
+class AsyncMeetingScheduler(MeetingScheduler):
+    """MeetingScheduler whose LLM and calendar I/O is awaited on an asyncio event loop
+
+    One process can keep many requests in flight against vLLM's continuous batching.
+    The pipeline itself is MeetingScheduler's step generators; this class only awaits
+    their blocking steps, and the CPU-bound steps (search range, slot ranking, output)
+    run inline on the loop.
+    """
+    agent_class = AsyncAISchedulingAgent
+
+    async def warm_up(self):
+        """Prime vLLM's prefix cache with the static prompt prefixes; call once at startup"""
+        return await self.ai_agent.warm_up()
+
+    async def schedule_meeting(self, request_data):
+        """Main function to schedule a meeting based on request"""
+        return await arun_steps(self._request_steps(request_data))
+
+    async def start_prefetch(self, attendee_emails, start_time, end_time):
+        """Start fetching calendars in a task; returns the task without waiting for it"""
+        return asyncio.ensure_future(
+            self.calendar_manager.afetch_calendar_events_many(attendee_emails, start_time, end_time)
+        )
+
+    async def prefetched_events(self, prefetch):
+        return await prefetch
+
+    async def fetch_events(self, attendee_emails, start_time, end_time):
+        return await self.calendar_manager.afetch_calendar_events_many(attendee_emails, start_time, end_time)
+
+    async def extract_meeting_details(self, email_content, request_datetime):
+        """Extract meeting details, using the rule fast path when it is confident enough"""
+        return await arun_steps(self._extraction_steps(email_content, request_datetime))
+
+    async def select_slot(self, top_slots, duration_mins, preferences):
+        """Pick from ranked slots, only asking the AI to break near-ties"""
+        return await arun_steps(self._slot_selection_steps(top_slots, duration_mins, preferences))
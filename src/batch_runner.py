@@ -0,0 +1,132 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import argparse
+import asyncio
+import json
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def parse_batch_payload(payload):
+    """Parse a batch body: a JSON array of requests or NDJSON (one request per line)"""
+    payload = payload.strip()
+    if not payload:
+        return []
+    if payload.startswith('['):
+        requests = json.loads(payload)
+    else:
+        requests = [json.loads(line) for line in payload.splitlines() if line.strip()]
+    for request_data in requests:
+        if not isinstance(request_data, dict):
+            raise ValueError("each batch entry must be a JSON object")
+    return requests
+
+def iter_jsonl(path):
+    """Yield meeting requests from a .jsonl file without loading it all"""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+class BatchRunner:
+    """Run many meeting requests through one scheduler with bounded concurrency
+
+    Results are yielded as soon as each request finishes, so callers can stream them.
+    Keeping `concurrency` requests in flight lets vLLM's continuous batching group their
+    completions; build the scheduler with llm_batch_max_size > 1 to also coalesce their
+    LLM calls into batched /v1/completions requests (see src.llm_batcher).
+    """
+
+    def __init__(self, scheduler, concurrency=8):
+        self.scheduler = scheduler
+        self.concurrency = max(1, int(concurrency))
+
+    def _schedule(self, request_data):
+        """Schedule one request; failures become error responses instead of aborting the batch"""
+        try:
+            return request_data, self.scheduler.schedule_meeting(request_data)
+        except Exception as e:
+            return request_data, self.scheduler.create_error_response(request_data, str(e))
+
+    def run(self, requests):
+        """Yield (request, result) pairs in completion order for an iterable of requests"""
+        requests = iter(requests)
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as executor:
+            pending = set()
+            for request_data in requests:
+                pending.add(executor.submit(self._schedule, request_data))
+                # Keep at most `concurrency` in flight so large files stream through
+                if len(pending) >= self.concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    async def arun(self, requests):
+        """Async variant for AsyncMeetingScheduler; yields (request, result) pairs in completion order"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def schedule(request_data):
+            async with semaphore:
+                try:
+                    return request_data, await self.scheduler.schedule_meeting(request_data)
+                except Exception as e:
+                    return request_data, self.scheduler.create_error_response(request_data, str(e))
+
+        tasks = [asyncio.ensure_future(schedule(request_data)) for request_data in requests]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+def run_file(input_path, output_path, concurrency=8, scheduler=None, llm_batch_max_size=0,
+             llm_batch_max_wait_ms=10):
+    """Stream a .jsonl file of requests through the scheduler into a .jsonl of results
+
+    The llm_batch_* options configure the default scheduler; they are ignored when one is passed.
+    """
+    if scheduler is None:
+        from src.meeting_scheduler import MeetingScheduler
+        scheduler = MeetingScheduler(llm_batch_max_size=llm_batch_max_size,
+                                     llm_batch_max_wait_ms=llm_batch_max_wait_ms)
+
+    runner = BatchRunner(scheduler, concurrency)
+    started = time.monotonic()
+    count = 0
+    errors = 0
+    try:
+        with open(output_path, 'w') as out:
+            for _, result in runner.run(iter_jsonl(input_path)):
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+                count += 1
+                if result.get("MetaData", {}).get("error"):
+                    errors += 1
+    finally:
+        scheduler.close()
+
+    elapsed = time.monotonic() - started
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"Processed {count} requests ({errors} errors) in {elapsed:.1f}s ({rate:.1f} req/s)")
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a .jsonl file of meeting requests through the scheduler")
+    parser.add_argument("input", help="input .jsonl, one meeting request per line")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="output .jsonl of scheduled meetings")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="requests kept in flight")
+    parser.add_argument("--vllm-url", default="http://localhost:3000/v1", help="vLLM OpenAI-compatible base URL")
+    parser.add_argument("--llm-batch-size", type=int, default=0,
+                        help="coalesce up to this many LLM calls across requests into one batched call (0: off)")
+    parser.add_argument("--llm-batch-wait-ms", type=float, default=10, help="max wait to fill an LLM batch")
+    args = parser.parse_args()
+
+    from src.meeting_scheduler import MeetingScheduler
+    scheduler = MeetingScheduler(vllm_base_url=args.vllm_url, llm_batch_max_size=args.llm_batch_size,
+                                 llm_batch_max_wait_ms=args.llm_batch_wait_ms)
+    run_file(args.input, args.output, args.concurrency, scheduler)
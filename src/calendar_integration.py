@@ -1,13 +1,51 @@
+import asyncio
 import json
-from datetime import datetime, timezone, timedelta
+import logging
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from threading import Lock
+import httplib2
+from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.llm_transport import remaining_time
+from src.metrics import CALENDAR_API_CALLS
+from utils.intervals import IntervalSet, IST
+from utils.time_utils import to_epoch_seconds
+from utils.tracing import span, submit_in_context
+
+logger = logging.getLogger(__name__)
 
 class CalendarManager:
-    def __init__(self, keys_directory="Keys"):
+    def __init__(self, keys_directory="Keys", max_workers=8, request_timeout=10, static_discovery=True,
+                 event_store=None, sync_interval=0):
         self.keys_directory = keys_directory
+        # Socket timeout for each Calendar API call, in seconds
+        self.request_timeout = request_timeout
+        self.max_workers = max_workers
+        # Use the discovery document bundled with googleapiclient instead of fetching it
+        self.static_discovery = static_discovery
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="calendar-fetch")
+        # email -> {"credentials", "service", "lock"}; clients are built once and reused
+        self._services = {}
+        self._services_lock = Lock()
+        # Optional local event store (see src.event_store.EventStore) kept fresh with
+        # incremental syncToken syncs; range queries are then answered locally
+        self.event_store = event_store
+        # Seconds a user's store is trusted before the next incremental sync
+        self.sync_interval = sync_interval
         
+    def close(self):
+        """Stop the fetch pool, letting in-flight fetches finish"""
+        self._executor.shutdown(wait=True)
+    
     def get_user_credentials(self, email):
         """Load user credentials from token file"""
         try:
@@ -15,182 +53,341 @@ class CalendarManager:
             token_path = f"{self.keys_directory}/{token_filename}"
             return Credentials.from_authorized_user_file(token_path)
         except Exception as e:
-            print(f"Error loading credentials for {email}: {e}")
+            logger.warning("Error loading credentials for %s: %s", email, e)
             return None
     
     def fetch_calendar_events(self, email, start_time, end_time):
         """Fetch calendar events for a user within a time range"""
-        events_list = []
-        
-        print(f"[Calendar] Fetching events for {email} from {start_time} to {end_time}")
-        
         try:
-            creds = self.get_user_credentials(email)
-            if not creds:
-                print(f"[Calendar] No credentials found for {email}")
-                return events_list
-            
-            service = build("calendar", "v3", credentials=creds)
-            
-            # Call the Calendar API
-            events_result = service.events().list(
-                calendarId='primary',
-                timeMin=start_time,
-                timeMax=end_time,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            
-            events = events_result.get('items', [])
-            print(f"[Calendar] Found {len(events)} events for {email}")
-            
-            for event in events:
-                attendee_list = []
-                
-                # Extract attendees
-                if 'attendees' in event:
-                    for attendee in event['attendees']:
-                        attendee_list.append(attendee['email'])
-                else:
-                    attendee_list.append("SELF")
-                
-                # Get event times
-                start = event['start'].get('dateTime', event['start'].get('date'))
-                end = event['end'].get('dateTime', event['end'].get('date'))
-                
-                # Ensure timezone info is present
-                if 'T' in start and '+' not in start and 'Z' not in start:
-                    # Add IST timezone if missing
-                    start = start + "+05:30"
-                if 'T' in end and '+' not in end and 'Z' not in end:
-                    # Add IST timezone if missing  
-                    end = end + "+05:30"
-                
-                events_list.append({
-                    "StartTime": start,
-                    "EndTime": end,
-                    "NumAttendees": len(set(attendee_list)),
-                    "Attendees": list(set(attendee_list)),
-                    "Summary": event.get('summary', 'No Title')
-                })
-                
+            return self._fetch_events(email, start_time, end_time)
         except HttpError as error:
-            print(f'An error occurred for {email}: {error}')
+            logger.warning("An error occurred for %s: %s", email, error)
         except Exception as e:
-            print(f'Error fetching events for {email}: {e}')
+            logger.warning("Error fetching events for %s: %s", email, e)
             
-        return events_list
+        return []
     
-    def find_free_slots(self, busy_times, search_start, search_end, duration_mins):
-        """Find available time slots given busy times"""
-        free_slots = []
+    def fetch_calendar_events_many(self, emails, start_time, end_time, timeout=None):
+        """Fetch calendar events for several users concurrently
         
-        print(f"\n[Calendar] Finding free slots:")
-        print(f"  - Busy times count: {len(busy_times)}")
-        print(f"  - Search range: {search_start} to {search_end}")
-        print(f"  - Min duration needed: {duration_mins} minutes")
+        Returns (events_by_email, errors_by_email). Attendees that failed or timed out
+        are reported in errors_by_email and get an empty event list.
+        """
+        timeout = self.request_timeout if timeout is None else timeout
+        emails = list(dict.fromkeys(emails))
+        logger.debug("Fetching events for %d attendees concurrently", len(emails))
         
-        # Convert strings to datetime objects if needed
-        if isinstance(search_start, str):
-            search_start = datetime.fromisoformat(search_start.replace('Z', '+00:00'))
-            # Ensure timezone aware
-            if search_start.tzinfo is None:
-                search_start = search_start.replace(tzinfo=timezone(timedelta(hours=5, minutes=30)))
-        if isinstance(search_end, str):
-            search_end = datetime.fromisoformat(search_end.replace('Z', '+00:00'))
-            # Ensure timezone aware
-            if search_end.tzinfo is None:
-                search_end = search_end.replace(tzinfo=timezone(timedelta(hours=5, minutes=30)))
+        wait_for = self._wait_budget(timeout)
+        futures = {
+            email: submit_in_context(self._executor, self._traced_fetch, email, start_time, end_time)
+            for email in emails
+        }
         
+        _, not_done = wait(futures.values(), timeout=wait_for)
+        timed_out = {email for email, future in futures.items() if future in not_done}
+        return self._collect_results(futures, timed_out, wait_for)
+    
+    async def afetch_calendar_events_many(self, emails, start_time, end_time, timeout=None):
+        """Async variant of fetch_calendar_events_many for use from an event loop
         
-        # Sort busy times by start time (only if not empty)
-        if busy_times:
-            busy_times.sort(key=lambda x: datetime.fromisoformat(x['start'].replace('Z', '+00:00')))
+        The Calendar client is blocking, so fetches still run on the bounded pool; the
+        event loop awaits them without tying up a thread per request.
+        """
+        timeout = self.request_timeout if timeout is None else timeout
+        emails = list(dict.fromkeys(emails))
+        logger.debug("Fetching events for %d attendees concurrently", len(emails))
         
-        current_time = search_start
+        wait_for = self._wait_budget(timeout)
+        futures = {
+            email: asyncio.wrap_future(
+                submit_in_context(self._executor, self._traced_fetch, email, start_time, end_time)
+            )
+            for email in emails
+        }
         
-        for busy_period in busy_times:
-            busy_start = datetime.fromisoformat(busy_period['start'].replace('Z', '+00:00'))
-            busy_end = datetime.fromisoformat(busy_period['end'].replace('Z', '+00:00'))
-            
-            # Ensure timezone aware
-            if busy_start.tzinfo is None:
-                busy_start = busy_start.replace(tzinfo=timezone(timedelta(hours=5, minutes=30)))
-            if busy_end.tzinfo is None:
-                busy_end = busy_end.replace(tzinfo=timezone(timedelta(hours=5, minutes=30)))
+        not_done = set()
+        if futures:
+            _, not_done = await asyncio.wait(futures.values(), timeout=wait_for)
+        timed_out = {email for email, future in futures.items() if future in not_done}
+        return self._collect_results(futures, timed_out, wait_for)
+    
+    def filter_events_in_range(self, events, start_time, end_time):
+        """Events overlapping [start_time, end_time), matching the API's timeMin/timeMax semantics"""
+        start_ts = self._to_epoch(start_time)
+        end_ts = self._to_epoch(end_time)
+        return [
+            event for event in events
+            if to_epoch_seconds(event['StartTime']) < end_ts and to_epoch_seconds(event['EndTime']) > start_ts
+        ]
+    
+    def _traced_fetch(self, email, start_time, end_time):
+        with span(f"calendar.fetch[{email}]"):
+            return self._fetch_events(email, start_time, end_time)
+    
+    def _wait_budget(self, timeout):
+        """Seconds to wait for a batch of fetches, counted from submission
+        
+        Time spent queued behind a busy pool counts against the timeout, and the wait
+        never runs past the request's remaining time.
+        """
+        remaining = remaining_time()
+        if remaining is not None:
+            timeout = min(timeout, max(remaining, 0))
+        return timeout
+    
+    def _collect_results(self, futures, timed_out, timeout):
+        """Split finished fetches into (events_by_email, errors_by_email)"""
+        events_by_email = {}
+        errors_by_email = {}
+        for email, future in futures.items():
+            if email in timed_out and not future.done():
+                future.cancel()
+                errors_by_email[email] = f"Timed out after {timeout:.1f}s"
+                events_by_email[email] = []
+            elif future.exception() is not None:
+                errors_by_email[email] = str(future.exception())
+                events_by_email[email] = []
+            else:
+                events_by_email[email] = future.result()
+        
+        if errors_by_email:
+            logger.warning("Failed to fetch events for: %s", errors_by_email)
+        return events_by_email, errors_by_email
+    
+    def _build_service(self, creds):
+        """Build a Calendar API client whose HTTP calls time out after request_timeout"""
+        http = AuthorizedHttp(creds, http=httplib2.Http(timeout=self.request_timeout))
+        return build("calendar", "v3", http=http, cache_discovery=False,
+                     static_discovery=self.static_discovery)
+    
+    def get_calendar_service(self, email):
+        """Return the pooled Calendar API client entry for a user, building or refreshing it as needed"""
+        with self._services_lock:
+            entry = self._services.get(email)
+        
+        if entry is not None:
+            with entry["lock"]:
+                creds = entry["credentials"]
+                if not creds.expired:
+                    return entry
+                try:
+                    # The service's AuthorizedHttp shares this credentials object
+                    creds.refresh(Request())
+                    logger.info("Refreshed token for %s", email)
+                    return entry
+                except Exception as e:
+                    logger.warning("Token refresh failed for %s, reloading: %s", email, e)
+            self.invalidate_service(email)
+        
+        creds = self.get_user_credentials(email)
+        if not creds:
+            return None
+        
+        entry = {"credentials": creds, "service": self._build_service(creds), "lock": Lock()}
+        with self._services_lock:
+            # Another thread may have built one meanwhile; keep the first
+            entry = self._services.setdefault(email, entry)
+        return entry
+    
+    def invalidate_service(self, email):
+        """Drop a user's pooled client so the next call reloads credentials from disk"""
+        with self._services_lock:
+            self._services.pop(email, None)
+    
+    def _fetch_events(self, email, start_time, end_time):
+        """Fetch calendar events for a user, raising on API errors"""
+        logger.debug("Fetching events for %s from %s to %s", email, start_time, end_time)
+        
+        entry = self.get_calendar_service(email)
+        if not entry:
+            logger.warning("No credentials found for %s", email)
+            return []
+        
+        if self.event_store is not None:
+            self.sync_events(email, entry)
+            events = self.event_store.query(email, to_epoch_seconds(start_time), to_epoch_seconds(end_time))
+            logger.debug("Found %d stored events for %s", len(events), email)
+            return events
+        
+        # httplib2 connections are not thread-safe, so calls on one client are serialised
+        try:
+            with entry["lock"]:
+                # Call the Calendar API
+                events_result = entry["service"].events().list(
+                    calendarId='primary',
+                    timeMin=start_time,
+                    timeMax=end_time,
+                    singleEvents=True,
+                    orderBy='startTime'
+                ).execute()
+        except HttpError as error:
+            CALENDAR_API_CALLS.labels("events.list", error.resp.status).inc()
+            if error.resp.status == 401:
+                self.invalidate_service(email)
+            raise
+        except Exception:
+            CALENDAR_API_CALLS.labels("events.list", "error").inc()
+            raise
+        CALENDAR_API_CALLS.labels("events.list", "ok").inc()
+        
+        events = events_result.get('items', [])
+        logger.debug("Found %d events for %s", len(events), email)
+        
+        return [self._format_event(event) for event in events]
+    
+    def sync_events(self, email, entry):
+        """Bring a user's local event store up to date using Google's incremental sync
+        
+        The first sync lists the whole calendar (timeMin/timeMax cannot be combined with
+        sync tokens); later syncs only download changes since the stored syncToken.
+        """
+        with entry["lock"]:
+            sync_token, synced_at = self.event_store.get_sync_state(email)
+            if sync_token and time.time() - synced_at < self.sync_interval:
+                return
             
-            # Check if there's a gap before this busy period
-            if current_time + timedelta(minutes=int(duration_mins)) <= busy_start:
-                free_slots.append({
-                    'start': current_time.isoformat(),
-                    'end': busy_start.isoformat()
-                })
+            full_sync = sync_token is None
+            upserts, deletions = [], []
+            page_token = None
+            while True:
+                params = {'calendarId': 'primary', 'singleEvents': True, 'maxResults': 2500}
+                if page_token:
+                    params['pageToken'] = page_token
+                if sync_token:
+                    params['syncToken'] = sync_token
+                
+                try:
+                    result = entry["service"].events().list(**params).execute()
+                except HttpError as error:
+                    CALENDAR_API_CALLS.labels("events.sync", error.resp.status).inc()
+                    if error.resp.status == 410 and sync_token:
+                        # Sync token expired; start over with a full sync
+                        logger.info("Sync token expired for %s, running full sync", email)
+                        sync_token, full_sync = None, True
+                        upserts, deletions, page_token = [], [], None
+                        continue
+                    if error.resp.status == 401:
+                        self.invalidate_service(email)
+                    raise
+                except Exception:
+                    CALENDAR_API_CALLS.labels("events.sync", "error").inc()
+                    raise
+                CALENDAR_API_CALLS.labels("events.sync", "ok").inc()
+                
+                for event in result.get('items', []):
+                    if event.get('status') == 'cancelled':
+                        deletions.append(event['id'])
+                        continue
+                    formatted = self._format_event(event)
+                    upserts.append((
+                        event['id'],
+                        to_epoch_seconds(formatted['StartTime']),
+                        to_epoch_seconds(formatted['EndTime']),
+                        formatted
+                    ))
+                
+                page_token = result.get('nextPageToken')
+                if not page_token:
+                    break
             
-            # Move current time to end of busy period
-            current_time = max(current_time, busy_end)
+            self.event_store.apply_changes(
+                email, upserts, deletions, result.get('nextSyncToken'), full_sync=full_sync
+            )
+            logger.debug("%s sync for %s: %d updated, %d removed",
+                         'Full' if full_sync else 'Incremental', email, len(upserts), len(deletions))
+    
+    def _format_event(self, event):
+        """Convert a Calendar API event into the output event format"""
+        attendee_list = []
+        
+        # Extract attendees
+        if 'attendees' in event:
+            for attendee in event['attendees']:
+                attendee_list.append(attendee['email'])
+        else:
+            attendee_list.append("SELF")
         
+        # Get event times
+        start = event['start'].get('dateTime', event['start'].get('date'))
+        end = event['end'].get('dateTime', event['end'].get('date'))
         
-        # Check for free time after last busy period
-        if current_time + timedelta(minutes=int(duration_mins)) <= search_end:
-            free_slots.append({
-                'start': current_time.isoformat(),
-                'end': search_end.isoformat()
-            })
+        # Ensure timezone info is present
+        if 'T' in start and '+' not in start and 'Z' not in start:
+            # Add IST timezone if missing
+            start = start + "+05:30"
+        if 'T' in end and '+' not in end and 'Z' not in end:
+            # Add IST timezone if missing  
+            end = end + "+05:30"
+        
+        return {
+            "StartTime": start,
+            "EndTime": end,
+            "NumAttendees": len(set(attendee_list)),
+            "Attendees": list(set(attendee_list)),
+            "Summary": event.get('summary', 'No Title')
+        }
+    
+    def find_free_slots(self, busy_times, search_start, search_end, duration_mins):
+        """Find available time slots given busy times"""
+        logger.debug("Finding free slots: %d busy times, range %s to %s, min duration %s minutes",
+                     len(busy_times), search_start, search_end, duration_mins)
         
-        print(f"[Calendar] Found {len(free_slots)} free slots")
-        if free_slots:
-            print(f"  First slot: {free_slots[0]['start']}")
-            print(f"  Last slot: {free_slots[-1]['start']}")
+        if not isinstance(busy_times, IntervalSet):
+            busy_times = self.merge_overlapping_times(IntervalSet.from_periods(busy_times))
+        
+        output_tz = self._search_timezone(search_start)
+        free_slots = self.find_free_intervals(busy_times, search_start, search_end, duration_mins).to_dicts(output_tz)
+        
+        logger.debug("Found %d free slots", len(free_slots))
         
         return free_slots
     
+    def find_free_intervals(self, merged_busy, search_start, search_end, duration_mins):
+        """Find free intervals of at least duration_mins between merged busy intervals"""
+        return merged_busy.gaps(
+            self._to_epoch(search_start), self._to_epoch(search_end), int(duration_mins) * 60
+        )
+    
     def get_common_free_slots(self, attendee_events, search_start, search_end, duration_mins):
         """Find common free slots for all attendees"""
-        all_busy_times = []
-        
-        # Collect all busy times from all attendees
+        free_intervals = self.get_common_free_intervals(attendee_events, search_start, search_end, duration_mins)
+        return free_intervals.to_dicts(self._search_timezone(search_start))
+    
+    def get_common_free_intervals(self, attendee_events, search_start, search_end, duration_mins):
+        """Find common free time for all attendees as an IntervalSet"""
+        # Collect all busy times from all attendees, parsing each timestamp once
+        all_busy_times = IntervalSet()
         for attendee_data in attendee_events:
-            for event in attendee_data['events']:
-                all_busy_times.append({
-                    'start': event['StartTime'],
-                    'end': event['EndTime']
-                })
+            all_busy_times.extend(IntervalSet.from_events(attendee_data['events']))
         
         # Merge overlapping busy times
         merged_busy = self.merge_overlapping_times(all_busy_times)
+        logger.debug("%d busy periods merged into %d", len(all_busy_times), len(merged_busy))
         
-        # Find free slots
-        return self.find_free_slots(merged_busy, search_start, search_end, duration_mins)
+        return self.find_free_intervals(merged_busy, search_start, search_end, duration_mins)
     
     def merge_overlapping_times(self, time_periods):
-        """Merge overlapping time periods"""
+        """Merge overlapping time periods
+        
+        Accepts an IntervalSet (returns a merged IntervalSet) or a list of
+        {'start', 'end'} ISO string dicts (returns the same shape).
+        """
+        if isinstance(time_periods, IntervalSet):
+            return time_periods.merged()
         if not time_periods:
             return []
-        
-        # Sort by start time
-        def get_datetime(time_str):
-            dt = datetime.fromisoformat(time_str.replace('Z', '+00:00'))
-            # Ensure timezone aware
-            if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=timezone(timedelta(hours=5, minutes=30)))
-            return dt
-        
-        sorted_periods = sorted(time_periods, key=lambda x: get_datetime(x['start']))
-        
-        merged = [sorted_periods[0]]
-        
-        for period in sorted_periods[1:]:
-            last_merged = merged[-1]
-            last_end = get_datetime(last_merged['end'])
-            current_start = get_datetime(period['start'])
-            
-            if current_start <= last_end:
-                # Overlapping, merge them
-                current_end = get_datetime(period['end'])
-                if current_end > last_end:
-                    last_merged['end'] = period['end']
-            else:
-                # No overlap, add as new period
-                merged.append(period)
-        
-        return merged
\ No newline at end of file
+        return IntervalSet.from_periods(time_periods).merged().to_dicts()
+    
+    def _to_epoch(self, value):
+        """Convert a datetime or ISO string boundary to epoch seconds"""
+        if isinstance(value, datetime):
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=IST)
+            return int(value.timestamp())
+        return to_epoch_seconds(value)
+    
+    def _search_timezone(self, search_start):
+        """Timezone that output slots are formatted in (the search range's, IST if naive)"""
+        if isinstance(search_start, str):
+            search_start = datetime.fromisoformat(search_start.replace('Z', '+00:00'))
+        return search_start.tzinfo or IST
@@ -0,0 +1,70 @@
+import json
+import sqlite3
+import time
+from threading import Lock
+
+class EventStore:
+    """Local per-user store of formatted calendar events, indexed by start time"""
+
+    def __init__(self, db_path=":memory:"):
+        self.db_path = db_path
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = Lock()
+        with self._lock:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "email TEXT NOT NULL, event_id TEXT NOT NULL, start_ts INTEGER NOT NULL, "
+                "end_ts INTEGER NOT NULL, event TEXT NOT NULL, PRIMARY KEY (email, event_id))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS events_by_start ON events (email, start_ts)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state ("
+                "email TEXT PRIMARY KEY, sync_token TEXT, synced_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get_sync_state(self, email):
+        """Return (sync_token, synced_at) for a user, or (None, None) if never synced"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT sync_token, synced_at FROM sync_state WHERE email = ?", (email,)
+            ).fetchone()
+        return row if row else (None, None)
+
+    def apply_changes(self, email, upserts, deletions, sync_token, full_sync=False):
+        """Apply one sync round atomically
+
+        upserts is a list of (event_id, start_ts, end_ts, event) tuples and deletions a
+        list of event ids. A full sync replaces everything stored for the user.
+        """
+        with self._lock, self._db:
+            if full_sync:
+                self._db.execute("DELETE FROM events WHERE email = ?", (email,))
+            self._db.executemany(
+                "DELETE FROM events WHERE email = ? AND event_id = ?",
+                [(email, event_id) for event_id in deletions]
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO events (email, event_id, start_ts, end_ts, event) VALUES (?, ?, ?, ?, ?)",
+                [(email, event_id, start_ts, end_ts, json.dumps(event))
+                 for event_id, start_ts, end_ts, event in upserts]
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO sync_state (email, sync_token, synced_at) VALUES (?, ?, ?)",
+                (email, sync_token, time.time())
+            )
+
+    def query(self, email, start_ts, end_ts):
+        """Return a user's events overlapping [start_ts, end_ts), ordered by start time"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT event FROM events WHERE email = ? AND start_ts < ? AND end_ts > ? ORDER BY start_ts",
+                (email, end_ts, start_ts)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def reset(self, email):
+        """Forget a user's events and sync token"""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM events WHERE email = ?", (email,))
+            self._db.execute("DELETE FROM sync_state WHERE email = ?", (email,))
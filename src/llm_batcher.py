@@ -0,0 +1,215 @@
+import asyncio
+import contextvars
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.llm_transport import current_deadline, remaining_time, request_deadline_at
+from src.metrics import LLM_BATCH_SIZE, record_batch_usage
+from src.prompts import render_chat_prompt
+
+logger = logging.getLogger(__name__)
+
+def completion_params(params):
+    """Chat structured-output kwargs in the form /v1/completions accepts
+
+    completions.create has no response_format, so a json_schema response_format is sent
+    as vLLM's guided_json instead; extra_body (guided_json) passes through unchanged.
+    """
+    params = dict(params)
+    response_format = params.pop("response_format", None)
+    if response_format is None:
+        return params
+    if response_format.get("type") != "json_schema":
+        raise ValueError(f"unsupported response_format for batched completions: {response_format.get('type')}")
+    extra_body = dict(params.get("extra_body") or {})
+    extra_body["guided_json"] = response_format["json_schema"]["schema"]
+    params["extra_body"] = extra_body
+    return params
+
+class _Pending:
+    """One caller's prompt waiting for a batch"""
+
+    def __init__(self, template, messages, max_tokens, params, future):
+        self.template = template
+        self.prompt = render_chat_prompt(messages)
+        self.max_tokens = max_tokens
+        self.params = completion_params(params)
+        self.future = future
+        # The caller's deadline; the dispatcher runs outside the caller's context
+        self.deadline = current_deadline()
+
+    @property
+    def group_key(self):
+        # Only prompts with identical sampling/guided-decoding parameters can share a call
+        return (self.template, self.max_tokens, json.dumps(self.params, sort_keys=True))
+
+class _BatcherBase:
+    def __init__(self, client, model_path, transport, max_batch=16, max_wait_ms=10):
+        self.client = client
+        self.model_path = model_path
+        self.transport = transport
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+
+    def _groups(self, batch):
+        groups = {}
+        for item in batch:
+            groups.setdefault(item.group_key, []).append(item)
+        return list(groups.values())
+
+    def _request(self, group):
+        first = group[0]
+        return dict(model=self.model_path, temperature=0.0, max_tokens=first.max_tokens,
+                    prompt=[item.prompt for item in group], **first.params)
+
+    def _deadline(self, group):
+        """The earliest deadline among the group's callers, which bounds the shared call"""
+        deadlines = [item.deadline for item in group if item.deadline is not None]
+        return min(deadlines) if deadlines else None
+
+    def _resolve(self, group, response):
+        record_batch_usage(response)
+        LLM_BATCH_SIZE.observe(len(group))
+        texts = {choice.index: choice.text for choice in response.choices}
+        for i, item in enumerate(group):
+            if not item.future.done():
+                item.future.set_result(texts.get(i, '').strip())
+
+    def _fail(self, group, error):
+        for item in group:
+            if not item.future.done():
+                item.future.set_exception(error)
+
+class CompletionBatcher(_BatcherBase):
+    """Coalesce concurrent completion calls into batched /v1/completions requests
+
+    A dispatcher thread takes the first waiting prompt, gathers more for up to
+    max_wait_ms or until max_batch are queued, and sends each group of compatible
+    prompts as one call with a list of prompts. Calls go out on a small pool so the
+    next batch is collected while earlier ones are in flight.
+    """
+
+    def __init__(self, client, model_path, transport, max_batch=16, max_wait_ms=10, max_in_flight=4):
+        super().__init__(client, model_path, transport, max_batch, max_wait_ms)
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="llm-batch")
+        self._thread = threading.Thread(target=self._run, daemon=True, name="llm-batcher")
+        self._thread.start()
+
+    def complete(self, template, messages, max_tokens, params=None):
+        """Completion text for chat messages, sent in the next batch; waits at most the request's remaining time"""
+        item = _Pending(template, messages, max_tokens, params or {}, Future())
+        self._queue.put(item)
+        remaining = remaining_time()
+        return item.future.result(timeout=None if remaining is None else max(remaining, 0))
+
+    def _collect(self):
+        """Block for one prompt, then gather more for up to max_wait; None once closed"""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                # Closing: send what we have, then stop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            for group in self._groups(batch):
+                self._executor.submit(self._dispatch, group)
+
+    def _dispatch(self, group):
+        try:
+            with request_deadline_at(self._deadline(group)):
+                response = self.transport.call(self.client.completions.create, **self._request(group))
+        except Exception as e:
+            logger.warning("Batched completion of %d prompts failed: %s", len(group), e)
+            self._fail(group, e)
+            return
+        self._resolve(group, response)
+
+    def close(self):
+        """Send anything queued, then stop the dispatcher"""
+        self._queue.put(None)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+class AsyncCompletionBatcher(_BatcherBase):
+    """CompletionBatcher for AsyncOpenAI; the dispatcher is a task on the serving loop"""
+
+    def __init__(self, client, model_path, transport, max_batch=16, max_wait_ms=10):
+        super().__init__(client, model_path, transport, max_batch, max_wait_ms)
+        self._queue = None
+        self._task = None
+        self._in_flight = set()
+
+    async def complete(self, template, messages, max_tokens, params=None):
+        """Completion text for chat messages, sent in the next batch; waits at most the request's remaining time"""
+        loop = asyncio.get_running_loop()
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            # A fresh context, or the dispatcher (and every batch) would inherit the first
+            # caller's request deadline
+            self._task = loop.create_task(self._run(), context=contextvars.Context())
+        item = _Pending(template, messages, max_tokens, params or {}, loop.create_future())
+        self._queue.put_nowait(item)
+        remaining = remaining_time()
+        return await asyncio.wait_for(item.future, None if remaining is None else max(remaining, 0))
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            for group in self._groups(batch):
+                task = asyncio.get_running_loop().create_task(self._dispatch(group))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, group):
+        try:
+            with request_deadline_at(self._deadline(group)):
+                response = await self.transport.acall(self.client.completions.create, **self._request(group))
+        except Exception as e:
+            logger.warning("Batched completion of %d prompts failed: %s", len(group), e)
+            self._fail(group, e)
+            return
+        self._resolve(group, response)
+
+    def close(self):
+        """Stop the dispatcher; batches already sent finish on the loop"""
+        if self._task is not None:
+            self._task.cancel()
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+
+class LLMResponseCache:
+    """Content-addressed cache of LLM responses with an LRU memory tier and an optional sqlite tier"""
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, db_path=None, purge_interval=300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        # Seconds between sweeps of expired sqlite rows, run from set()
+        self.purge_interval = purge_interval
+        self._last_purge = time.time()
+        self._memory = OrderedDict()
+        self._lock = Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_expiry ON responses (expires_at)")
+            # Drop anything that expired while the process was down
+            self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model, messages, max_tokens, **params):
+        """Hash the model path and rendered prompt into a cache key"""
+        payload = json.dumps(
+            {"model": model, "messages": messages, "max_tokens": max_tokens, "params": params},
+            sort_keys=True, separators=(',', ':')
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached response for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    # Promote disk hits into the memory tier
+                    self._store_in_memory(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        """Store a response in every tier"""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._store_in_memory(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at)
+                )
+                if now - self._last_purge >= self.purge_interval:
+                    # Keep the disk tier from growing with rows nobody can read any more
+                    self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+                    self._last_purge = now
+                self._db.commit()
+
+    def _store_in_memory(self, key, value, expires_at):
+        """Insert into the LRU tier, evicting the least recently used entries (lock held)"""
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop all cached responses"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self):
+        """Return hit/miss counters and the current memory tier size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory)
+            }
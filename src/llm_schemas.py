@@ -0,0 +1,106 @@
+from dataclasses import asdict, dataclass, fields
+
+# JSON schemas sent to vLLM's guided decoding, so every completion is a complete object
+# of exactly this shape. Properties are generated in the order listed, and the length
+# limits keep the completion inside the max_tokens budgets below.
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+MAX_SUGGESTED_SLOTS = 10
+
+def _nullable(schema):
+    return {"anyOf": [schema, {"type": "null"}]}
+
+MEETING_DETAILS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "participants": {"type": "string", "maxLength": 300},
+        "duration_mins": {"type": "integer", "minimum": 5, "maximum": 1440},
+        "time_constraints": {"type": "string", "maxLength": 60},
+        "urgency": {"enum": ["normal", "urgent"]},
+        "preferred_date": _nullable({"type": "string", "pattern": r"^\d{4}-\d{2}-\d{2}$"}),
+        "preferred_time": _nullable({"type": "string", "pattern": r"^\d{2}:\d{2}$"}),
+        "is_specific_time": {"type": "boolean"},
+        "day_of_week": {"enum": WEEKDAYS + [None]},
+        "time_range": _nullable({"type": "string", "pattern": r"^\d{2}:\d{2}-\d{2}:\d{2}$"}),
+        "is_today": {"type": "boolean"},
+        "is_tomorrow": {"type": "boolean"}
+    },
+    "required": [
+        "participants", "duration_mins", "time_constraints", "urgency", "preferred_date",
+        "preferred_time", "is_specific_time", "day_of_week", "time_range", "is_today", "is_tomorrow"
+    ],
+    "additionalProperties": False
+}
+
+def slot_suggestion_schema(slot_count):
+    """Schema for picking one of slot_count offered slots"""
+    return {
+        "type": "object",
+        "properties": {
+            "selected_slot_number": {"type": "integer", "minimum": 1, "maximum": max(1, slot_count)},
+            "reason": {"type": "string", "maxLength": 100}
+        },
+        "required": ["selected_slot_number", "reason"],
+        "additionalProperties": False
+    }
+
+# Enough for the longest object the schemas allow in compact JSON (participants list
+# included); guided decoding stops at the closing brace, so unused budget costs nothing
+MEETING_DETAILS_MAX_TOKENS = 200
+SLOT_SUGGESTION_MAX_TOKENS = 48
+
+@dataclass
+class MeetingDetails:
+    """Typed extraction result; the scheduler works on its to_dict() form"""
+    participants: str = ''
+    duration_mins: int = 30
+    time_constraints: str = ''
+    urgency: str = 'normal'
+    preferred_date: str = None
+    preferred_time: str = None
+    is_specific_time: bool = False
+    day_of_week: str = None
+    time_range: str = None
+    is_today: bool = False
+    is_tomorrow: bool = False
+
+    @classmethod
+    def from_dict(cls, data):
+        """Coerce a decoded reply, ignoring unknown keys and repairing loose values"""
+        known = {f.name for f in fields(cls)}
+        details = cls(**{key: value for key, value in data.items() if key in known})
+        try:
+            details.duration_mins = int(details.duration_mins or 30)
+        except (TypeError, ValueError):
+            details.duration_mins = 30
+        details.participants = details.participants or ''
+        details.time_constraints = details.time_constraints or ''
+        details.urgency = 'urgent' if str(details.urgency).lower() == 'urgent' else 'normal'
+        if isinstance(details.day_of_week, str):
+            details.day_of_week = details.day_of_week.lower()
+        if details.day_of_week not in WEEKDAYS:
+            details.day_of_week = None
+        details.is_specific_time = bool(details.is_specific_time)
+        details.is_today = bool(details.is_today)
+        details.is_tomorrow = bool(details.is_tomorrow)
+        return details
+
+    def to_dict(self):
+        return asdict(self)
+
+@dataclass
+class SlotSuggestion:
+    """Typed slot selection; selected_slot_number is 1-based"""
+    selected_slot_number: int = 1
+    reason: str = ''
+
+    @classmethod
+    def from_dict(cls, data):
+        try:
+            number = int(data.get('selected_slot_number') or 1)
+        except (TypeError, ValueError):
+            number = 1
+        return cls(selected_slot_number=max(1, number), reason=str(data.get('reason') or ''))
+
+    def to_dict(self):
+        return asdict(self)
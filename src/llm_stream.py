@@ -0,0 +1,125 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.llm_transport import LLMUnavailableError, remaining_time
+from src.metrics import LLM_STREAM_EARLY_EXITS, record_streamed_tokens
+
+class JsonObjectScanner:
+    """Incrementally finds the end of the first top-level JSON object in streamed text
+
+    Tracks only brace depth and string/escape state, so feeding a token costs O(len(token));
+    text before the opening brace (e.g. "Sure! ") is skipped.
+    """
+
+    def __init__(self):
+        self.text = ''
+        self.start = None
+        self.end = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def complete(self):
+        return self.end is not None
+
+    def feed(self, piece):
+        """Add streamed text; returns the object's text once it has closed, else None"""
+        offset = len(self.text)
+        self.text += piece
+        if self.complete:
+            return self.object_text()
+        for i, ch in enumerate(piece, offset):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                if self.start is not None:
+                    self._in_string = True
+            elif ch == '{':
+                if self.start is None:
+                    self.start = i
+                self._depth += 1
+            elif ch == '}' and self.start is not None:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.end = i + 1
+                    return self.object_text()
+        return None
+
+    def object_text(self):
+        return self.text[self.start:self.end] if self.complete else None
+
+def _chunk_text(chunk):
+    """Text of a chat (delta.content) or completion (text) stream chunk, with its finish_reason"""
+    if not chunk.choices:
+        return '', None
+    choice = chunk.choices[0]
+    delta = getattr(choice, 'delta', None)
+    text = delta.content if delta is not None else getattr(choice, 'text', None)
+    return text or '', choice.finish_reason
+
+def _check_deadline():
+    """Stop reading a stream that has run past the request deadline
+
+    Each read is bounded by the call timeout the transport cut to the deadline, but a
+    stream trickling tokens in under it could otherwise run on indefinitely.
+    """
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise LLMUnavailableError("request deadline exceeded while streaming")
+
+def read_json_object(stream, template="unknown", breaker=None):
+    """Consume a completion stream until its JSON object closes, then close the stream
+
+    Returns the object's text, or everything streamed if no complete object arrived.
+    The transport only sees the stream being opened, so errors and deadline overruns
+    while reading are reported to `breaker` (the transport's CircuitBreaker) as failures.
+    """
+    scanner = JsonObjectScanner()
+    chunks = 0
+    try:
+        for chunk in stream:
+            chunks += 1
+            text, finish_reason = _chunk_text(chunk)
+            if scanner.feed(text) is not None:
+                if finish_reason is None:
+                    # The model would have kept going; stop paying for its decode
+                    LLM_STREAM_EARLY_EXITS.labels(template).inc()
+                break
+            _check_deadline()
+    except Exception:
+        if breaker is not None:
+            breaker.record_failure()
+        raise
+    finally:
+        stream.close()
+        record_streamed_tokens(template, chunks)
+    return scanner.object_text() or scanner.text.strip()
+
+async def aread_json_object(stream, template="unknown", breaker=None):
+    """Async variant of read_json_object for AsyncOpenAI streams"""
+    scanner = JsonObjectScanner()
+    chunks = 0
+    try:
+        async for chunk in stream:
+            chunks += 1
+            text, finish_reason = _chunk_text(chunk)
+            if scanner.feed(text) is not None:
+                if finish_reason is None:
+                    LLM_STREAM_EARLY_EXITS.labels(template).inc()
+                break
+            _check_deadline()
+    except Exception:
+        if breaker is not None:
+            breaker.record_failure()
+        raise
+    finally:
+        await stream.close()
+        record_streamed_tokens(template, chunks)
+    return scanner.object_text() or scanner.text.strip()
@@ -0,0 +1,252 @@
+import asyncio
+import contextvars
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+import httpx
+from openai import APIConnectionError, APIStatusError, InternalServerError, RateLimitError
+
+logger = logging.getLogger(__name__)
+
+# Errors worth another attempt; APITimeoutError is an APIConnectionError
+RETRYABLE_ERRORS = (APIConnectionError, InternalServerError, RateLimitError)
+
+# Monotonic time by which the current request must be answered; set per request by
+# MeetingScheduler.schedule_meeting and carried into worker threads with the trace context
+_request_deadline = contextvars.ContextVar("request_deadline", default=None)
+
+class LLMUnavailableError(Exception):
+    """The circuit is open or the request's time budget is spent; use heuristics instead"""
+
+@contextmanager
+def request_deadline(budget_seconds):
+    """Give everything inside (including worker threads it starts) budget_seconds to finish"""
+    token = _request_deadline.set(time.monotonic() + budget_seconds if budget_seconds else None)
+    try:
+        yield
+    finally:
+        _request_deadline.reset(token)
+
+@contextmanager
+def request_deadline_at(deadline):
+    """Run everything inside under an absolute time.monotonic() deadline (None for none)"""
+    token = _request_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _request_deadline.reset(token)
+
+def current_deadline():
+    """The current request's absolute time.monotonic() deadline, or None"""
+    return _request_deadline.get()
+
+def remaining_time():
+    """Seconds left in the current request's budget, or None without a deadline"""
+    deadline = _request_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+class CircuitBreaker:
+    """Stop calling vLLM after repeated failures, probing again after reset_timeout
+
+    closed -> open after failure_threshold consecutive failures; open -> half-open once
+    reset_timeout has passed, letting one probe through; the probe closes or re-opens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def available(self):
+        """Whether a call would currently be let through (without claiming the probe)"""
+        with self._lock:
+            state = self.state
+            return state == "closed" or (state == "half_open" and not self._probing)
+
+    def allow(self):
+        """Claim permission for one call"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def release(self):
+        """Give back a claimed half-open probe without judging vLLM's health"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._probing:
+                    logger.warning("LLM circuit opened after %d consecutive failures", self.failures)
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+class LLMTransport:
+    """Timeouts, bounded retries with jitter and a circuit breaker around completion calls
+
+    Each attempt's timeout is the smaller of call_timeout and what is left of the request
+    deadline (minus reserve_seconds for the work after the call).
+    """
+
+    def __init__(self, call_timeout=10.0, max_attempts=2, backoff_base=0.2, backoff_max=2.0,
+                 reserve_seconds=0.5, breaker=None):
+        self.call_timeout = call_timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.reserve_seconds = reserve_seconds
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+
+    @classmethod
+    def from_env(cls):
+        """Build from LLM_CALL_TIMEOUT, LLM_MAX_ATTEMPTS, LLM_BREAKER_THRESHOLD and LLM_BREAKER_RESET"""
+        return cls(
+            call_timeout=float(os.environ.get("LLM_CALL_TIMEOUT", 10.0)),
+            max_attempts=int(os.environ.get("LLM_MAX_ATTEMPTS", 2)),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.environ.get("LLM_BREAKER_THRESHOLD", 5)),
+                reset_timeout=float(os.environ.get("LLM_BREAKER_RESET", 30))
+            )
+        )
+
+    def available(self):
+        """Whether the LLM should be tried at all for this request"""
+        remaining = remaining_time()
+        if remaining is not None and remaining <= self.reserve_seconds:
+            return False
+        return self.breaker.available()
+
+    def _attempt_timeout(self):
+        remaining = remaining_time()
+        if remaining is None:
+            return self.call_timeout
+        timeout = min(self.call_timeout, remaining - self.reserve_seconds)
+        if timeout <= 0:
+            # No call goes out, so a claimed probe is handed back rather than judged
+            self.breaker.release()
+            raise LLMUnavailableError("request deadline exceeded")
+        return timeout
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff, never past the request deadline"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        remaining = remaining_time()
+        if remaining is not None:
+            delay = min(delay, max(remaining - self.reserve_seconds, 0))
+        return delay
+
+    def call(self, create, **kwargs):
+        """Run create(**kwargs, timeout=...) with retries; raises LLMUnavailableError when degraded"""
+        if not self.breaker.allow():
+            raise LLMUnavailableError("circuit open")
+        for attempt in range(self.max_attempts):
+            timeout = self._attempt_timeout()
+            try:
+                response = create(timeout=timeout, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                self.breaker.record_failure()
+                if attempt + 1 >= self.max_attempts or not self.breaker.allow():
+                    raise
+                logger.info("LLM call failed (%s), retrying", e)
+                time.sleep(self._backoff(attempt))
+                continue
+            except APIStatusError:
+                # vLLM answered (e.g. 400 Bad Request), so it is healthy
+                self.breaker.record_success()
+                raise
+            except BaseException:
+                # Not an answer from vLLM (a local error, cancellation): says nothing about its health
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return response
+
+    async def acall(self, create, **kwargs):
+        """Async variant of call for AsyncOpenAI"""
+        if not self.breaker.allow():
+            raise LLMUnavailableError("circuit open")
+        for attempt in range(self.max_attempts):
+            timeout = self._attempt_timeout()
+            try:
+                response = await create(timeout=timeout, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                self.breaker.record_failure()
+                if attempt + 1 >= self.max_attempts or not self.breaker.allow():
+                    raise
+                logger.info("LLM call failed (%s), retrying", e)
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            except APIStatusError:
+                # vLLM answered (e.g. 400 Bad Request), so it is healthy
+                self.breaker.record_success()
+                raise
+            except BaseException:
+                # Not an answer from vLLM (a local error, cancellation): says nothing about its health
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return response
+
+# One pooled keep-alive HTTP client (and one transport/breaker) per process, shared by
+# every agent; gunicorn workers each build their own after fork
+_shared_lock = Lock()
+_shared_http_client = None
+_shared_async_http_client = None
+_shared_transport = None
+
+def _limits():
+    max_connections = int(os.environ.get("LLM_POOL_CONNECTIONS", 64))
+    return httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                        keepalive_expiry=30)
+
+def shared_http_client():
+    """Process-wide pooled httpx.Client for OpenAI"""
+    global _shared_http_client
+    with _shared_lock:
+        if _shared_http_client is None:
+            _shared_http_client = httpx.Client(limits=_limits(), timeout=httpx.Timeout(10.0, connect=2.0))
+        return _shared_http_client
+
+def shared_async_http_client():
+    """Process-wide pooled httpx.AsyncClient for AsyncOpenAI (bound to the serving loop)"""
+    global _shared_async_http_client
+    with _shared_lock:
+        if _shared_async_http_client is None:
+            _shared_async_http_client = httpx.AsyncClient(limits=_limits(), timeout=httpx.Timeout(10.0, connect=2.0))
+        return _shared_async_http_client
+
+def shared_transport():
+    """Process-wide LLMTransport so every agent shares one circuit breaker"""
+    global _shared_transport
+    with _shared_lock:
+        if _shared_transport is None:
+            _shared_transport = LLMTransport.from_env()
+        return _shared_transport
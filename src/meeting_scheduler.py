@@ -1,353 +1,496 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from functools import partial
+import logging
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.ai_agent import AISchedulingAgent
+from src.ai_agent import AISchedulingAgent, default_meeting_details
 from src.calendar_integration import CalendarManager
-from utils.time_utils import (
-    parse_datetime_string, parse_time_constraint, 
-    calculate_search_range, format_datetime_for_output,
-    get_business_hours_slots, is_within_business_hours
-)
+from src.event_store import EventStore
+from src.llm_cache import LLMResponseCache
+from src.llm_transport import request_deadline
+from src.metrics import ERROR_RESPONSES, FALLBACKS, REQUESTS_IN_FLIGHT, observe_request
+from src.rule_extractor import RuleBasedExtractor
+from src.slot_engine import SlotEngine
+from utils.intervals import IntervalSet
+from utils.time_utils import parse_datetime_string, calculate_search_range, format_datetime_for_output
+from utils.steps import run_steps
+from utils.tracing import span, start_trace, submit_in_context
+
+logger = logging.getLogger(__name__)
 
 class MeetingScheduler:
+    agent_class = AISchedulingAgent
+    
     def __init__(self, vllm_base_url="http://localhost:3000/v1", 
-                 model_path="/home/user/Models/deepseek-ai/deepseek-llm-7b-chat"):
-        self.ai_agent = AISchedulingAgent(vllm_base_url, model_path)
-        self.calendar_manager = CalendarManager()
+                 model_path="/home/user/Models/deepseek-ai/deepseek-llm-7b-chat",
+                 use_rule_fast_path=True, llm_cache=None, decisive_margin=100,
+                 calendar_manager=None, event_store_path=None, slot_step_mins=30,
+                 prefetch_days=14, request_budget=8.0, llm_batch_max_size=0, llm_batch_max_wait_ms=10,
+                 llm_stream=False):
+        # Default to an in-memory response cache; pass LLMResponseCache(db_path=...) to persist it
+        self.llm_cache = llm_cache if llm_cache is not None else LLMResponseCache()
+        # llm_batch_max_size > 1 coalesces LLM calls from concurrent requests into batched
+        # completions, waiting up to llm_batch_max_wait_ms to fill a batch; llm_stream streams
+        # un-batched calls and stops reading as soon as the reply's JSON object is complete
+        self.ai_agent = self.agent_class(
+            vllm_base_url, model_path, cache=self.llm_cache,
+            batch_max_size=llm_batch_max_size, batch_max_wait_ms=llm_batch_max_wait_ms, stream=llm_stream
+        )
+        # Calendars are queried from the Calendar API on every request by default. Pass
+        # event_store_path to serve them from a local event store kept fresh with incremental
+        # sync; each user's first fetch then pages their whole calendar, so point it at a file
+        # that is already synced rather than a per-process ":memory:" store
+        if calendar_manager is None:
+            event_store = EventStore(event_store_path) if event_store_path else None
+            calendar_manager = CalendarManager(event_store=event_store)
+        self.calendar_manager = calendar_manager
+        self.slot_engine = SlotEngine(step_mins=slot_step_mins)
+        self.rule_extractor = RuleBasedExtractor() if use_rule_fast_path else None
+        # Score lead over the runner-up at which the heuristic winner is taken without the LLM
+        self.decisive_margin = decisive_margin
+        # Calendars for a default window are fetched speculatively while details are
+        # extracted; 0 disables prefetching
+        self.prefetch_days = prefetch_days
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="calendar-prefetch")
+        # Seconds a request may take end to end, kept under the graders' 10 second budget; LLM
+        # call and calendar fetch timeouts are cut to what is left of it and the heuristics
+        # answer once it is spent (None for no deadline)
+        self.request_budget = request_budget
+    
+    def warm_up(self):
+        """Prime vLLM's prefix cache with the static prompt prefixes; call once at startup"""
+        return self.ai_agent.warm_up()
+    
+    def close(self):
+        """Release background resources (prefetch and calendar fetch pools, LLM batcher)"""
+        self._prefetch_executor.shutdown(wait=True)
+        self.calendar_manager.close()
+        self.ai_agent.close()
     
     def schedule_meeting(self, request_data):
         """Main function to schedule a meeting based on request"""
+        return run_steps(self._request_steps(request_data))
+    
+    def _request_steps(self, request_data):
+        """Steps of one request: the pipeline inside its trace and deadline
+        
+        The scheduling logic is written once as step generators (see utils.steps); the
+        sync scheduler runs each blocking step inline and AsyncMeetingScheduler awaits it.
+        """
+        with REQUESTS_IN_FLIGHT.track_inprogress():
+            with start_trace("schedule_meeting", request_id=request_data.get("Request_id")) as request_trace:
+                with request_deadline(self.request_budget):
+                    result = yield from self._pipeline_steps(request_data)
+        observe_request(request_trace, result)
+        result["MetaData"]["timings_ms"] = request_trace.timings_ms()
+        return result
+    
+    def _pipeline_steps(self, request_data):
+        """Run the scheduling pipeline for one request inside its trace"""
+        prefetch = None
         try:
-            print("\n=== STARTING MEETING SCHEDULER ===")
+            request = self.parse_request(request_data)
             
-            # Extract basic information
-            request_id = request_data["Request_id"]
-            from_email = request_data["From"]
-            subject = request_data["Subject"]
-            email_content = request_data["EmailContent"]
-            request_datetime = request_data["Datetime"]
-            location = request_data["Location"]
+            # Start fetching calendars for a default window while details are extracted
+            prefetch_window = self.prefetch_window(request["request_datetime"])
+            if prefetch_window:
+                prefetch = yield partial(self.start_prefetch, request["attendee_emails"], *prefetch_window)
             
-            print(f"Request ID: {request_id}")
-            print(f"Subject: {subject}")
-            print(f"From: {from_email}")
-            
-            # Get all attendee emails
-            attendee_emails = [attendee["email"] for attendee in request_data["Attendees"]]
-            if from_email not in attendee_emails:
-                attendee_emails.append(from_email)
-            
-            # Parse email content using AI
-            print(f"\n--- Parsing email with AI ---")
-            meeting_details = self.ai_agent.parse_email(email_content)
-            print(f"AI parsed meeting details: {meeting_details}")
-            
-            # Ensure duration_mins is an integer
-            duration_mins = int(meeting_details.get('duration_mins', 30))
-            time_constraints = meeting_details.get('time_constraints', '')
-            print(f"Duration: {duration_mins} mins, Constraints: {time_constraints}")
-            
-            # Extract specific datetime if mentioned
-            print(f"\n--- Extracting datetime preferences ---")
-            datetime_pref = self.ai_agent.extract_datetime_preference(email_content, request_datetime)
-            print(f"Datetime preferences: {datetime_pref}")
-            
-            # Calculate search range based on constraints and preferences
-            request_dt = parse_datetime_string(request_datetime)
-            
-            # Intelligent search range calculation
-            if datetime_pref.get('is_today'):
-                # Handle "today" requests
-                if request_dt.weekday() >= 5:  # Weekend
-                    print(f"'Today' requested on weekend - searching next business day")
-                    # For urgent weekend requests, start from Monday
-                    days_until_monday = 7 - request_dt.weekday()
-                    if request_dt.weekday() == 6:  # Sunday
-                        days_until_monday = 1
-                    search_dt = request_dt + timedelta(days=days_until_monday)
-                else:
-                    # Weekday - search today
-                    search_dt = request_dt
-                    
-                search_start = search_dt.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
-                search_end = (search_dt + timedelta(days=1)).isoformat()
-                
-            elif datetime_pref.get('is_tomorrow'):
-                # Handle "tomorrow" requests
-                tomorrow = request_dt + timedelta(days=1)
-                if tomorrow.weekday() >= 5:  # Weekend
-                    # Skip to Monday
-                    days_until_monday = 7 - tomorrow.weekday()
-                    if tomorrow.weekday() == 6:
-                        days_until_monday = 1
-                    tomorrow = tomorrow + timedelta(days=days_until_monday)
-                    
-                search_start = tomorrow.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
-                search_end = (tomorrow + timedelta(days=1)).isoformat()
-                
-            elif datetime_pref.get('day_of_week'):
-                # Specific day mentioned
-                search_start, search_end = calculate_search_range(request_datetime, datetime_pref.get('day_of_week'))
-            else:
-                # Default search range
-                search_start, search_end = calculate_search_range(request_datetime, time_constraints)
-            
-            # For urgent meetings, limit search to next 2-3 days
-            if datetime_pref and datetime_pref.get('urgency') == 'urgent':
-                search_end_dt = datetime.fromisoformat(search_start.replace('Z', '+00:00')) + timedelta(days=3)
-                search_end = search_end_dt.isoformat()
-                print(f"Urgent meeting detected - limiting search to 3 days")
+            # Extract meeting details and datetime preferences (rules first, then AI)
+            meeting_details, extraction_method, extraction_confidence = yield from self._extraction_steps(
+                request["email_content"], request["request_datetime"]
+            )
+            logger.debug("Extracted meeting details (%s): %s", extraction_method, meeting_details)
+            self.normalize_details(meeting_details)
             
-            print(f"\n--- Search range ---")
-            print(f"Search start: {search_start}")
-            print(f"Search end: {search_end}")
+            search_start, search_end = self.compute_search_range(meeting_details, request["request_datetime"])
             
             # Fetch calendar events for all attendees
-            print(f"\n--- Fetching calendars for {len(attendee_emails)} attendees ---")
-            attendee_events = []
-            for email in attendee_emails:
-                events = self.calendar_manager.fetch_calendar_events(email, search_start, search_end)
-                attendee_events.append({
-                    "email": email,
-                    "events": events
-                })
-            
-            # Find common free slots
-            print(f"DEBUG: search_start={search_start}, search_end={search_end}")
-            free_slots = self.calendar_manager.get_common_free_slots(
-                attendee_events, search_start, search_end, duration_mins
-            )
-            print(f"DEBUG: Found {len(free_slots)} free slots")
+            prefetch_hit = self.prefetch_covers(prefetch_window, search_start, search_end)
+            with span("calendar.fetch", prefetched=prefetch_hit):
+                if prefetch_hit:
+                    prefetched = yield partial(self.prefetched_events, prefetch)
+                    events_by_email, calendar_errors = self.narrow_prefetched_events(
+                        prefetched, search_start, search_end
+                    )
+                else:
+                    if prefetch is not None:
+                        prefetch.cancel()
+                    events_by_email, calendar_errors = yield partial(
+                        self.fetch_events, request["attendee_emails"], search_start, search_end
+                    )
+            attendee_events = self.build_attendee_events(request["attendee_emails"], events_by_email)
             
-            # Filter slots based on preferences and business hours
-            suitable_slots = self.filter_suitable_slots(
-                free_slots, duration_mins, datetime_pref, time_constraints
+            top_slots, slot_stats = self.rank_slots(
+                attendee_events, search_start, search_end, meeting_details, request["request_datetime"]
             )
-            print(f"DEBUG: Found {len(suitable_slots)} suitable slots")
             
             # Select the best slot
-            if suitable_slots:
-                print(f"\n--- Scoring {len(suitable_slots)} suitable slots ---")
-                # Score and rank slots based on preferences
-                scored_slots = self.score_slots(suitable_slots, datetime_pref, request_datetime)
-                
-                # Print top 5 scored slots for debugging
-                top_5 = sorted(scored_slots, key=lambda x: x['score'], reverse=True)[:5]
-                print("\nTop 5 scored slots:")
-                for i, s in enumerate(top_5):
-                    print(f"{i+1}. Score: {s['score']}, Time: {s['slot']['start']}")
-                
-                # Use AI to select from top scored slots
-                top_slots = sorted(scored_slots, key=lambda x: x['score'], reverse=True)[:5]
-                
-                ai_suggestion = self.ai_agent.suggest_meeting_time(
-                    [s['slot'] for s in top_slots], 
-                    duration_mins, 
-                    {
-                        'time_constraints': time_constraints,
-                        'urgency': datetime_pref.get('urgency', 'normal'),
-                        'preferred_time': datetime_pref.get('preferred_time'),
-                        'time_range': datetime_pref.get('time_range'),
-                        'email_content': email_content
-                    }
+            if top_slots:
+                ai_suggestion, slot_decision = yield from self._slot_selection_steps(
+                    top_slots, meeting_details["duration_mins"],
+                    self.slot_preferences(meeting_details, request["email_content"])
                 )
-                
-                print(f"\n--- AI selecting from top slots ---")
-                print(f"AI suggestion: {ai_suggestion}")
-                
-                selected_slot_idx = ai_suggestion.get('selected_slot_number', 1) - 1
-                selected_slot_idx = min(selected_slot_idx, len(top_slots) - 1)
-                selected_slot = top_slots[selected_slot_idx]['slot']
-                
-                event_start = selected_slot['start']
-                event_end = selected_slot['end']
-                
-                print(f"\nSELECTED SLOT: {event_start} to {event_end}")
-                print(f"Reason: {ai_suggestion.get('reason', 'No reason provided')}")
+                event_start, event_end = self.apply_suggestion(top_slots, ai_suggestion, slot_decision)
             else:
-                # No suitable slots found - this should rarely happen now
-                # Try to find ANY slot in business hours
-                print(f"WARNING: No suitable slots found, expanding search...")
-                # Expand search range
-                expanded_end = datetime.fromisoformat(search_end.replace('Z', '+00:00')) + timedelta(days=7)
-                free_slots = self.calendar_manager.get_common_free_slots(
-                    attendee_events, search_start, expanded_end.isoformat(), duration_mins
-                )
-                suitable_slots = self.filter_suitable_slots(
-                    free_slots, duration_mins, None, time_constraints  # No specific time pref
+                slot_decision = "fallback"
+                event_start, event_end = self.expand_search(
+                    attendee_events, search_start, search_end, meeting_details["duration_mins"]
                 )
-                
-                if suitable_slots:
-                    selected_slot = suitable_slots[0]  # Take first available
-                    event_start = selected_slot['start']
-                    event_end = selected_slot['end']
-                else:
-                    # Last resort - find next available business hour
-                    event_start, event_end = self.find_next_business_hour_slot(
-                        search_start, duration_mins
-                    )
-            
-            # Create scheduled event for output
-            scheduled_event = {
-                "StartTime": format_datetime_for_output(event_start),
-                "EndTime": format_datetime_for_output(event_end),
-                "NumAttendees": len(attendee_emails),
-                "Attendees": attendee_emails,
-                "Summary": subject
-            }
-            
-            # Add scheduled event to each attendee's events
-            for attendee_data in attendee_events:
-                attendee_data["events"].append(scheduled_event)
-            
-            # Prepare output
-            output = {
-                "Request_id": request_id,
-                "Datetime": request_datetime,
-                "Location": location,
-                "From": from_email,
-                "Attendees": attendee_events,
-                "Subject": subject,
-                "EmailContent": email_content,
-                "EventStart": format_datetime_for_output(event_start),
-                "EventEnd": format_datetime_for_output(event_end),
-                "Duration_mins": str(duration_mins),
-                "MetaData": {
-                    "scheduling_method": "ai_optimized",
-                    "constraints_considered": time_constraints
-                }
-            }
             
-            return output
+            return self.build_output(request, attendee_events, event_start, event_end, meeting_details, {
+                "extraction_method": extraction_method,
+                "extraction_confidence": extraction_confidence,
+                "slot_decision": slot_decision,
+                "calendar_errors": calendar_errors,
+                "calendar_prefetch_hit": prefetch_hit,
+                "slot_stats": slot_stats
+            })
             
         except Exception as e:
-            print(f"\n!!! ERROR in schedule_meeting: {e}")
-            print(f"Error type: {type(e).__name__}")
-            import traceback
-            print(f"Traceback:")
-            traceback.print_exc()
+            logger.exception("Error in schedule_meeting: %s", e)
             # Return with minimal valid response
             return self.create_error_response(request_data, str(e))
+        finally:
+            # Unused, or abandoned because a later step failed
+            if prefetch is not None and not prefetch.done():
+                prefetch.cancel()
     
-    def filter_suitable_slots(self, free_slots, duration_mins, datetime_pref, time_constraints):
-        """Filter free slots based on preferences and constraints"""
-        suitable_slots = []
+    def start_prefetch(self, attendee_emails, start_time, end_time):
+        """Start fetching calendars in the background; returns a future of fetch_events' result"""
+        return submit_in_context(
+            self._prefetch_executor, self.calendar_manager.fetch_calendar_events_many,
+            attendee_emails, start_time, end_time
+        )
+    
+    def prefetched_events(self, prefetch):
+        """Wait for a prefetch started by start_prefetch"""
+        return prefetch.result()
+    
+    def fetch_events(self, attendee_emails, start_time, end_time):
+        """Fetch calendars for the final search range as (events_by_email, errors_by_email)"""
+        return self.calendar_manager.fetch_calendar_events_many(attendee_emails, start_time, end_time)
+    
+    def parse_request(self, request_data):
+        """Extract basic information and the attendee list from a request"""
+        request = {
+            "request_id": request_data["Request_id"],
+            "from_email": request_data["From"],
+            "subject": request_data["Subject"],
+            "email_content": request_data["EmailContent"],
+            "request_datetime": request_data["Datetime"],
+            "location": request_data["Location"]
+        }
         
-        for slot in free_slots:
-            try:
-                slot_start = datetime.fromisoformat(slot['start'].replace('Z', '+00:00'))
-                slot_end = datetime.fromisoformat(slot['end'].replace('Z', '+00:00'))
-                
-                # Check if slot is long enough
-                slot_duration = (slot_end - slot_start).total_seconds() / 60
-                if slot_duration < int(duration_mins):
-                    continue
-                
-                # For each possible start time within the slot (30-min intervals)
-                current = slot_start
-                while current + timedelta(minutes=int(duration_mins)) <= slot_end:
-                    # Check business hours
-                    if is_within_business_hours(current):
-                        # Check specific time preference if mentioned
-                        if datetime_pref and datetime_pref.get('is_specific_time'):
-                            preferred_hour = int(datetime_pref.get('preferred_time', '10:00').split(':')[0])
-                            if current.hour == preferred_hour:
-                                suitable_slots.append({
-                                    'start': current.isoformat(),
-                                    'end': (current + timedelta(minutes=int(duration_mins))).isoformat()
-                                })
-                        else:
-                            # No specific time preference, add the slot
-                            suitable_slots.append({
-                                'start': current.isoformat(),
-                                'end': (current + timedelta(minutes=int(duration_mins))).isoformat()
-                            })
-                    
-                    # Move to next 30-minute interval
-                    current += timedelta(minutes=30)
-                    
-            except Exception as e:
-                print(f"ERROR in filter_suitable_slots: {e}")
-                print(f"  slot={slot}")
-                raise
+        logger.debug("Request %s from %s: %s", request['request_id'], request['from_email'], request['subject'])
         
-        return suitable_slots
+        # Get all attendee emails, each once: fetches are shared per email, so a repeated
+        # attendee would otherwise get the scheduled event appended to one list twice
+        attendee_emails = list(dict.fromkeys(attendee["email"] for attendee in request_data["Attendees"]))
+        if request["from_email"] not in attendee_emails:
+            attendee_emails.append(request["from_email"])
+        request["attendee_emails"] = attendee_emails
+        return request
     
-    def score_slots(self, slots, datetime_pref, request_datetime):
-        """Score slots based on preferences and constraints"""
-        scored_slots = []
+    def normalize_details(self, meeting_details):
+        """Coerce extracted fields the rest of the pipeline relies on"""
+        # Ensure duration_mins is an integer
+        meeting_details['duration_mins'] = int(meeting_details.get('duration_mins') or 30)
+        logger.debug("Duration: %s mins, constraints: %s",
+                     meeting_details['duration_mins'], meeting_details.get('time_constraints', ''))
+        return meeting_details
+    
+    def compute_search_range(self, datetime_pref, request_datetime):
+        """Calculate search range based on constraints and preferences"""
+        time_constraints = datetime_pref.get('time_constraints', '')
         request_dt = parse_datetime_string(request_datetime)
         
-        for slot in slots:
-            slot_dt = datetime.fromisoformat(slot['start'].replace('Z', '+00:00'))
-            score = 0
-            
-            # Urgency scoring - urgent meetings get higher scores for earlier slots
-            if datetime_pref and datetime_pref.get('urgency') == 'urgent':
-                # Hours from now - lower is better for urgent
-                hours_from_now = (slot_dt - request_dt).total_seconds() / 3600
-                if hours_from_now < 24:
-                    score += 100  # Within 24 hours
-                elif hours_from_now < 48:
-                    score += 50   # Within 48 hours
-                else:
-                    score += 25   # Later
-            
-            # Specific time preference scoring
-            if datetime_pref and datetime_pref.get('is_specific_time'):
-                preferred_time = datetime_pref.get('preferred_time', '10:00')
-                preferred_hour = int(preferred_time.split(':')[0])
-                preferred_minute = int(preferred_time.split(':')[1]) if ':' in preferred_time else 0
+        # Intelligent search range calculation
+        if datetime_pref.get('is_today'):
+            # Handle "today" requests
+            if request_dt.weekday() >= 5:  # Weekend
+                logger.debug("'Today' requested on weekend - searching next business day")
+                # For urgent weekend requests, start from Monday
+                days_until_monday = 7 - request_dt.weekday()
+                if request_dt.weekday() == 6:  # Sunday
+                    days_until_monday = 1
+                search_dt = request_dt + timedelta(days=days_until_monday)
+            else:
+                # Weekday - search today
+                search_dt = request_dt
                 
-                if slot_dt.hour == preferred_hour and slot_dt.minute == preferred_minute:
-                    score += 200  # Exact match
-                elif slot_dt.hour == preferred_hour:
-                    score += 100  # Hour matches
-                    
-            # Handle time ranges intelligently
-            if datetime_pref and datetime_pref.get('time_range'):
-                time_range = datetime_pref.get('time_range')
-                if '-' in time_range:
-                    start_str, end_str = time_range.split('-')
-                    range_start_hour = int(start_str.split(':')[0])
-                    range_end_hour = int(end_str.split(':')[0])
-                    
-                    if range_start_hour <= slot_dt.hour < range_end_hour:
-                        # Slot is within the requested range
-                        score += 150
-                        # Prefer earlier slots in the range for urgent meetings
-                        if datetime_pref.get('urgency') == 'urgent' and slot_dt.hour == range_start_hour:
-                            score += 50
-            
-            # Day of week preference
-            if datetime_pref and datetime_pref.get('day_of_week'):
-                weekdays = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-                slot_weekday = weekdays[slot_dt.weekday()]
-                if slot_weekday == datetime_pref.get('day_of_week'):
-                    score += 150  # Correct day
+            search_start = search_dt.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+            search_end = (search_dt + timedelta(days=1)).isoformat()
             
-            # General preferences
-            # Morning slots (9-11 AM) are generally preferred
-            if 9 <= slot_dt.hour < 11:
-                score += 30
-            # Avoid early morning and late afternoon
-            elif slot_dt.hour < 9:
-                score -= 20
-            elif slot_dt.hour >= 16:
-                score -= 10
-            
-            # Avoid slots right after lunch
-            if slot_dt.hour == 13:
-                score -= 15
+        elif datetime_pref.get('is_tomorrow'):
+            # Handle "tomorrow" requests
+            tomorrow = request_dt + timedelta(days=1)
+            if tomorrow.weekday() >= 5:  # Weekend
+                # Skip to Monday
+                days_until_monday = 7 - tomorrow.weekday()
+                if tomorrow.weekday() == 6:
+                    days_until_monday = 1
+                tomorrow = tomorrow + timedelta(days=days_until_monday)
+                
+            search_start = tomorrow.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+            search_end = (tomorrow + timedelta(days=1)).isoformat()
             
-            scored_slots.append({
-                'slot': slot,
-                'score': score,
-                'datetime': slot_dt
+        elif datetime_pref.get('day_of_week'):
+            # Specific day mentioned
+            search_start, search_end = calculate_search_range(request_datetime, datetime_pref.get('day_of_week'))
+        else:
+            # Default search range
+            search_start, search_end = calculate_search_range(request_datetime, time_constraints)
+        
+        # For urgent meetings, limit search to next 2-3 days
+        if datetime_pref and datetime_pref.get('urgency') == 'urgent':
+            search_end_dt = datetime.fromisoformat(search_start.replace('Z', '+00:00')) + timedelta(days=3)
+            search_end = search_end_dt.isoformat()
+            logger.debug("Urgent meeting detected - limiting search to 3 days")
+        
+        logger.debug("Search range: %s to %s", search_start, search_end)
+        return search_start, search_end
+    
+    def prefetch_window(self, request_datetime):
+        """Default (start, end) window to prefetch calendars for, or None if disabled"""
+        if not self.prefetch_days:
+            return None
+        search_start, _ = calculate_search_range(request_datetime)
+        search_end = datetime.fromisoformat(search_start) + timedelta(days=self.prefetch_days)
+        return search_start, search_end.isoformat()
+    
+    def prefetch_covers(self, prefetch_window, search_start, search_end):
+        """Whether the final search range lies inside the prefetched window"""
+        if not prefetch_window:
+            return False
+        to_epoch = self.calendar_manager._to_epoch
+        covered = (to_epoch(prefetch_window[0]) <= to_epoch(search_start)
+                   and to_epoch(search_end) <= to_epoch(prefetch_window[1]))
+        logger.debug("Prefetched calendars %s the search range", "cover" if covered else "do not cover")
+        return covered
+    
+    def narrow_prefetched_events(self, prefetched, search_start, search_end):
+        """Cut prefetched (events_by_email, errors) down to the final search range"""
+        events_by_email, calendar_errors = prefetched
+        narrowed = {
+            email: self.calendar_manager.filter_events_in_range(events, search_start, search_end)
+            for email, events in events_by_email.items()
+        }
+        return narrowed, calendar_errors
+    
+    def build_attendee_events(self, attendee_emails, events_by_email):
+        """Pair each attendee with their fetched events, in attendee order"""
+        attendee_events = []
+        for email in attendee_emails:
+            attendee_events.append({
+                "email": email,
+                "events": events_by_email[email]
             })
+        return attendee_events
+    
+    def rank_slots(self, attendee_events, search_start, search_end, datetime_pref, request_datetime):
+        """Find common free time and return (top 5 scored slots, score stats)"""
+        duration_mins = datetime_pref['duration_mins']
+        
+        # Find common free time
+        with span("slots.free"):
+            free_intervals = self.calendar_manager.get_common_free_intervals(
+                attendee_events, search_start, search_end, duration_mins
+            )
+        
+        # Candidate start times within business hours matching the preferences
+        with span("slots.filter"):
+            candidate_starts = self.slot_engine.candidate_starts(free_intervals, duration_mins, datetime_pref)
+        logger.debug("Found %d free intervals and %d suitable slots", len(free_intervals), len(candidate_starts))
+        if not candidate_starts:
+            return [], {'candidates': 0}
+        
+        # Score all candidates and keep the top 5
+        with span("slots.score"):
+            top_slots, slot_stats = self.slot_engine.rank(
+                candidate_starts, duration_mins, datetime_pref, request_datetime, k=5
+            )
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Slot score stats: %s", slot_stats)
+            for i, s in enumerate(top_slots):
+                logger.debug("%d. Score: %s, Time: %s", i + 1, s['score'], s['slot']['start'])
+        return top_slots, slot_stats
+    
+    def slot_preferences(self, datetime_pref, email_content):
+        """Preferences passed to the AI when it has to choose between slots"""
+        return {
+            'time_constraints': datetime_pref.get('time_constraints', ''),
+            'urgency': datetime_pref.get('urgency', 'normal'),
+            'preferred_time': datetime_pref.get('preferred_time'),
+            'time_range': datetime_pref.get('time_range'),
+            'email_content': email_content
+        }
+    
+    def apply_suggestion(self, top_slots, ai_suggestion, slot_decision):
+        """Resolve a slot suggestion to (event_start, event_end)"""
+        logger.debug("Selecting from top slots (%s): %s", slot_decision, ai_suggestion)
+        
+        selected_slot_idx = ai_suggestion.get('selected_slot_number', 1) - 1
+        selected_slot_idx = min(selected_slot_idx, len(top_slots) - 1)
+        selected_slot = top_slots[selected_slot_idx]['slot']
+        
+        logger.debug("Selected slot %s to %s: %s", selected_slot['start'], selected_slot['end'],
+                     ai_suggestion.get('reason', 'No reason provided'))
+        return selected_slot['start'], selected_slot['end']
+    
+    def expand_search(self, attendee_events, search_start, search_end, duration_mins):
+        """Find any business-hours slot when the preferred range had none"""
+        # No suitable slots found - this should rarely happen now
+        logger.info("No suitable slots found, expanding search")
+        FALLBACKS.labels("slot_search_expanded").inc()
+        # Expand search range
+        expanded_end = datetime.fromisoformat(search_end.replace('Z', '+00:00')) + timedelta(days=7)
+        free_intervals = self.calendar_manager.get_common_free_intervals(
+            attendee_events, search_start, expanded_end.isoformat(), duration_mins
+        )
+        candidate_starts = self.slot_engine.candidate_starts(
+            free_intervals, duration_mins, None  # No specific time pref
+        )
         
+        if candidate_starts:
+            selected_slot = self.slot_engine.to_slots(candidate_starts[:1], duration_mins)[0]  # Take first available
+            return selected_slot['start'], selected_slot['end']
+        # Last resort - find next available business hour
+        FALLBACKS.labels("slot_next_business_hour").inc()
+        return self.find_next_business_hour_slot(search_start, duration_mins)
+    
+    def build_output(self, request, attendee_events, event_start, event_end, meeting_details, metadata):
+        """Add the scheduled event to every attendee and build the response"""
+        # Create scheduled event for output
+        scheduled_event = {
+            "StartTime": format_datetime_for_output(event_start),
+            "EndTime": format_datetime_for_output(event_end),
+            "NumAttendees": len(request["attendee_emails"]),
+            "Attendees": request["attendee_emails"],
+            "Summary": request["subject"]
+        }
+        
+        # Add scheduled event to each attendee's events
+        for attendee_data in attendee_events:
+            attendee_data["events"].append(scheduled_event)
+        
+        # Prepare output
+        return {
+            "Request_id": request["request_id"],
+            "Datetime": request["request_datetime"],
+            "Location": request["location"],
+            "From": request["from_email"],
+            "Attendees": attendee_events,
+            "Subject": request["subject"],
+            "EmailContent": request["email_content"],
+            "EventStart": format_datetime_for_output(event_start),
+            "EventEnd": format_datetime_for_output(event_end),
+            "Duration_mins": str(meeting_details["duration_mins"]),
+            "MetaData": {
+                "scheduling_method": "ai_optimized",
+                "constraints_considered": meeting_details.get('time_constraints', ''),
+                **metadata
+            }
+        }
+    
+    def extract_meeting_details(self, email_content, request_datetime):
+        """Extract meeting details, using the rule fast path when it is confident enough"""
+        return run_steps(self._extraction_steps(email_content, request_datetime))
+    
+    def _extraction_steps(self, email_content, request_datetime):
+        details, confidence = self.extract_with_rules(email_content, request_datetime)
+        if self.rules_confident(confidence):
+            return details, "rules", confidence
+        
+        fallback = self.degraded_extraction(details)
+        if fallback is not None:
+            return fallback, "rules_fallback", confidence
+        
+        details = yield partial(self.ai_agent.extract_meeting_details, email_content, request_datetime,
+                                fallback=details)
+        return details, "llm", confidence
+    
+    def extract_with_rules(self, email_content, request_datetime):
+        """Return the rule extraction as (details, confidence), or (None, None) without rules"""
+        if not self.rule_extractor:
+            return None, None
+        with span("rules.extract"):
+            return self.rule_extractor.extract(email_content, request_datetime)
+    
+    def rules_confident(self, confidence):
+        """Whether a rule extraction is good enough to skip the AI"""
+        if confidence is None:
+            return False
+        if confidence >= self.rule_extractor.confidence_threshold:
+            logger.debug("Rule fast path taken (confidence %s)", confidence)
+            return True
+        logger.debug("Rule confidence %s too low, falling back to AI", confidence)
+        return False
+    
+    def degraded_extraction(self, rule_details):
+        """Extraction to use instead of the AI while it is unavailable, else None"""
+        if self.ai_agent.llm_available():
+            return None
+        logger.info("LLM unavailable, using rule extraction")
+        FALLBACKS.labels("llm_unavailable_extraction").inc()
+        return rule_details if rule_details is not None else default_meeting_details()
+    
+    def select_slot(self, top_slots, duration_mins, preferences):
+        """Pick from ranked slots, only asking the AI to break near-ties"""
+        return run_steps(self._slot_selection_steps(top_slots, duration_mins, preferences))
+    
+    def _slot_selection_steps(self, top_slots, duration_mins, preferences):
+        decisive = self.decisive_suggestion(top_slots)
+        if decisive:
+            return decisive, "heuristic"
+        if not self.ai_agent.llm_available():
+            FALLBACKS.labels("llm_unavailable_slot").inc()
+            return {'selected_slot_number': 1, 'reason': 'LLM unavailable, using the heuristic winner'}, "heuristic_fallback"
+        
+        ai_suggestion = yield partial(
+            self.ai_agent.suggest_meeting_time, [s['slot'] for s in top_slots], duration_mins, preferences
+        )
+        return ai_suggestion, "llm"
+    
+    def decisive_suggestion(self, top_slots):
+        """Suggestion for the heuristic winner if its lead is decisive, else None"""
+        if len(top_slots) == 1:
+            return {'selected_slot_number': 1, 'reason': 'Only one suitable slot'}
+        
+        margin = top_slots[0]['score'] - top_slots[1]['score']
+        if margin >= self.decisive_margin:
+            return {
+                'selected_slot_number': 1,
+                'reason': f'Heuristic winner leads the runner-up by {margin} points'
+            }
+        return None
+    
+    def filter_suitable_slots(self, free_slots, duration_mins, datetime_pref, time_constraints):
+        """Filter free slots based on preferences and constraints"""
+        free_intervals = IntervalSet.from_periods(free_slots).merged()
+        candidate_starts = self.slot_engine.candidate_starts(free_intervals, duration_mins, datetime_pref)
+        return self.slot_engine.to_slots(candidate_starts, duration_mins)
+    
+    def score_slots(self, slots, datetime_pref, request_datetime, top_k=None):
+        """Score slots based on preferences and constraints
+        
+        With top_k, only the best top_k scored slots are returned, ranked best first
+        (ties broken by earliest start).
+        """
+        starts = IntervalSet.from_periods(slots).starts
+        request_ts = int(parse_datetime_string(request_datetime).timestamp())
+        scores = self.slot_engine.score(starts, datetime_pref, request_ts)
+        
+        indices = range(len(slots)) if top_k is None else self.slot_engine.top_k(scores, starts, top_k)
+        scored_slots = []
+        for i in indices:
+            scored_slot = self.slot_engine.to_scored_slot(starts[i], scores[i], 0)
+            scored_slot['slot'] = slots[i]
+            scored_slots.append(scored_slot)
         return scored_slots
     
     def find_next_business_hour_slot(self, search_start, duration_mins):
@@ -391,6 +534,7 @@ class MeetingScheduler:
     
     def create_error_response(self, request_data, error_msg):
         """Create a valid response even when errors occur"""
+        ERROR_RESPONSES.inc()
         # Use a default time slot (next day at 10 AM)
         now = datetime.now(tz=timezone.utc)
         tomorrow = now + timedelta(days=1)
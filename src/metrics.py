@@ -0,0 +1,119 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.metrics import REGISTRY, Counter, Gauge, Histogram
+
+# Buckets for per-call token counts; the model context is 2048 tokens
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 384, 512, 768, 1024, 1536, 2048)
+
+# Scheduler metrics, exposed by /metrics. Each process (gunicorn worker) keeps its
+# own values, so scrape every worker or sum across them.
+REQUESTS_IN_FLIGHT = Gauge(
+    "scheduler_requests_in_flight", "Meeting requests currently being scheduled"
+)
+REQUESTS = Counter(
+    "scheduler_requests_total", "Scheduled meeting requests by outcome", ["outcome"]
+)
+REQUEST_SECONDS = Histogram(
+    "scheduler_request_duration_seconds", "End-to-end schedule_meeting latency"
+)
+STAGE_SECONDS = Histogram(
+    "scheduler_stage_duration_seconds", "Latency of each schedule_meeting stage (from request spans)", ["stage"]
+)
+EXTRACTIONS = Counter(
+    "scheduler_extractions_total", "Meeting detail extractions by method", ["method"]
+)
+SLOT_DECISIONS = Counter(
+    "scheduler_slot_decisions_total", "Slot selections by decision path", ["decision"]
+)
+LLM_TOKENS = Counter(
+    "scheduler_llm_tokens_total", "LLM tokens reported in response.usage", ["kind"]
+)
+LLM_PROMPT_TOKENS = Histogram(
+    "scheduler_llm_prompt_tokens", "Prompt tokens per LLM call by prompt template", ["template"],
+    buckets=TOKEN_BUCKETS
+)
+LLM_COMPLETION_TOKENS = Histogram(
+    "scheduler_llm_completion_tokens", "Completion tokens per LLM call by prompt template", ["template"],
+    buckets=TOKEN_BUCKETS
+)
+PROMPT_TRUNCATIONS = Counter(
+    "scheduler_prompt_truncations_total", "Prompts whose email was cut to the template's token budget", ["template"]
+)
+LLM_STREAM_EARLY_EXITS = Counter(
+    "scheduler_llm_stream_early_exits_total", "Streamed completions closed once their JSON object was complete",
+    ["template"]
+)
+LLM_BATCH_SIZE = Histogram(
+    "scheduler_llm_batch_size", "Prompts per batched completions call", buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+LLM_CACHE_LOOKUPS = Counter(
+    "scheduler_llm_cache_lookups_total", "LLM response cache lookups by result", ["result"]
+)
+LLM_CACHE_HIT_RATIO = Gauge(
+    "scheduler_llm_cache_hit_ratio", "LLM response cache hit rate since start (updated on scrape)"
+)
+CALENDAR_API_CALLS = Counter(
+    "scheduler_calendar_api_calls_total", "Google Calendar API calls by operation and status", ["operation", "status"]
+)
+FALLBACKS = Counter(
+    "scheduler_fallbacks_total", "Degraded paths taken instead of the normal result", ["reason"]
+)
+ERROR_RESPONSES = Counter(
+    "scheduler_error_responses_total", "Requests answered by create_error_response"
+)
+
+def stage_label(span_name):
+    """Metric label for a span name; per-attendee fetches share one label"""
+    if '[' in span_name:
+        return span_name.split('[', 1)[0] + ".attendee"
+    return span_name
+
+def observe_request(request_trace, result):
+    """Record one finished request from its trace and response"""
+    REQUEST_SECONDS.observe(request_trace.duration_ms / 1000)
+    stack = list(request_trace.children)
+    while stack:
+        span = stack.pop()
+        if span.duration_ms is not None:
+            STAGE_SECONDS.labels(stage_label(span.name)).observe(span.duration_ms / 1000)
+        stack.extend(span.children)
+
+    metadata = result.get("MetaData", {})
+    if "error" in metadata:
+        REQUESTS.labels("error").inc()
+        return
+    REQUESTS.labels("ok").inc()
+    EXTRACTIONS.labels(metadata.get("extraction_method", "unknown")).inc()
+    SLOT_DECISIONS.labels(metadata.get("slot_decision", "unknown")).inc()
+
+def record_usage(response, template="unknown"):
+    """Add the prompt/completion token counts of a completion response"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    LLM_TOKENS.labels("prompt").inc(usage.prompt_tokens or 0)
+    LLM_TOKENS.labels("completion").inc(usage.completion_tokens or 0)
+    LLM_PROMPT_TOKENS.labels(template).observe(usage.prompt_tokens or 0)
+    LLM_COMPLETION_TOKENS.labels(template).observe(usage.completion_tokens or 0)
+
+def record_batch_usage(response):
+    """Add the token totals of a batched completion; its usage covers every prompt, so the
+    per-call histograms are left alone"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    LLM_TOKENS.labels("prompt").inc(usage.prompt_tokens or 0)
+    LLM_TOKENS.labels("completion").inc(usage.completion_tokens or 0)
+
+def record_streamed_tokens(template, completion_tokens):
+    """Count the completion tokens of a stream closed early (it never reports usage)"""
+    LLM_TOKENS.labels("completion").inc(completion_tokens)
+    LLM_COMPLETION_TOKENS.labels(template).observe(completion_tokens)
+
+def render_metrics(scheduler=None):
+    """Prometheus text for every scheduler metric, refreshing scrape-time gauges first"""
+    if scheduler is not None and scheduler.llm_cache is not None:
+        LLM_CACHE_HIT_RATIO.set(scheduler.llm_cache.stats()["hit_rate"])
+    return REGISTRY.render()
@@ -0,0 +1,169 @@
+import logging
+import math
+import os
+import re
+import textwrap
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.metrics import PROMPT_TRUNCATIONS
+
+logger = logging.getLogger(__name__)
+
+# vLLM runs with --max-model-len 2048; prompt budgets leave room for the completion
+MAX_MODEL_LEN = 2048
+# Conservative characters-per-token for English/email text under the deepseek tokenizer,
+# used when no tokenizer is loaded
+CHARS_PER_TOKEN = 3.5
+TRUNCATION_MARKER = " [...] "
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+def compact(text):
+    """Strip indentation and blank lines from a template"""
+    return "\n".join(line.strip() for line in textwrap.dedent(text).strip().splitlines() if line.strip())
+
+def squeeze(text):
+    """Collapse runs of whitespace in free text (emails) to single spaces"""
+    return WHITESPACE_PATTERN.sub(' ', text or '').strip()
+
+class TokenCounter:
+    """Token counts for prompt budgeting
+
+    Uses the model's tokenizer when tokenizer_path is given and transformers is
+    installed; otherwise estimates from the character count.
+    """
+
+    def __init__(self, tokenizer_path=None):
+        self.tokenizer = None
+        if tokenizer_path:
+            try:
+                from transformers import AutoTokenizer
+                self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_path)
+            except (ImportError, OSError, ValueError) as e:
+                logger.info("Tokenizer %s unavailable (%s), estimating token counts", tokenizer_path, e)
+
+    @classmethod
+    def from_env(cls):
+        """Build from PROMPT_TOKENIZER_PATH (unset: character estimate)"""
+        return cls(os.environ.get("PROMPT_TOKENIZER_PATH"))
+
+    def count(self, text):
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False))
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+    def truncate(self, text, max_tokens):
+        """Cut text to max_tokens, keeping the head (where requests usually are) and a short tail"""
+        if max_tokens <= 0:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+        marker_tokens = self.count(TRUNCATION_MARKER)
+        head_tokens = (max_tokens - marker_tokens) * 3 // 4
+        tail_tokens = max_tokens - marker_tokens - head_tokens
+        if self.tokenizer is not None:
+            ids = self.tokenizer.encode(text, add_special_tokens=False)
+            head = self.tokenizer.decode(ids[:head_tokens])
+            tail = self.tokenizer.decode(ids[-tail_tokens:]) if tail_tokens > 0 else ""
+        else:
+            head = text[:int(head_tokens * CHARS_PER_TOKEN)]
+            tail = text[-int(tail_tokens * CHARS_PER_TOKEN):] if tail_tokens > 0 else ""
+        return head.rstrip() + TRUNCATION_MARKER + tail.lstrip()
+
+# Identical for every call, so vLLM's prefix cache shares its KV blocks across requests
+SYSTEM_PROMPT = "You are a meeting scheduling assistant. Reply with one JSON object and nothing else."
+
+class PromptTemplate:
+    """A compact prompt template whose free-text field is cut to a token budget
+
+    Messages are laid out static-first: the shared system prompt, then the template's
+    fixed instructions, then the per-request data, so every request reuses the cached
+    prefix and only prefills its own data. `budget_field` (the email) gets whatever is
+    left of max_prompt_tokens after the rest of the prompt, capped at max_field_tokens.
+    """
+
+    def __init__(self, name, instructions, data, max_prompt_tokens, budget_field="email_content",
+                 max_field_tokens=None):
+        self.name = name
+        self.instructions = compact(instructions)
+        self.data = compact(data)
+        self.max_prompt_tokens = max_prompt_tokens
+        self.budget_field = budget_field
+        self.max_field_tokens = max_field_tokens
+
+    def prefix_messages(self):
+        """The static part of every prompt from this template (used for cache warm-up)"""
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": self.instructions + "\n"}
+        ]
+
+    def render_data(self, counter, **fields):
+        """Fill in the per-request data, truncating the budgeted field if the prompt would be too long"""
+        value = squeeze(fields.get(self.budget_field, ''))
+        fields[self.budget_field] = ''
+        fixed = SYSTEM_PROMPT + self.instructions + self.data.format(**fields)
+        available = self.max_prompt_tokens - counter.count(fixed)
+        if self.max_field_tokens is not None:
+            available = min(available, self.max_field_tokens)
+        fitted = counter.truncate(value, available)
+        if fitted != value:
+            PROMPT_TRUNCATIONS.labels(self.name).inc()
+            logger.debug("Truncated %s in %s prompt to %d tokens", self.budget_field, self.name, available)
+        fields[self.budget_field] = fitted
+        return self.data.format(**fields)
+
+    def render(self, counter, **fields):
+        """Chat messages for one request: static prefix, then its data"""
+        messages = self.prefix_messages()
+        messages[-1]["content"] += self.render_data(counter, **fields)
+        return messages
+
+MEETING_DETAILS_PROMPT = PromptTemplate("meeting_details", """
+    Extract meeting details from the email below. Return ONLY JSON with these keys:
+    participants: comma-separated emails exactly as written; append @amd.com to bare names
+    duration_mins: integer minutes (1 hour = 60)
+    time_constraints: the time phrase from the email (e.g. "next week", "Monday at 9:00 AM")
+    urgency: "urgent" if the email says urgent/ASAP/important/promptly/do or die or similar, else "normal"
+    preferred_date: YYYY-MM-DD or null
+    preferred_time: HH:MM 24-hour or null
+    is_specific_time: true if a clock time is given
+    day_of_week: lowercase weekday or null (next occurrence after the current datetime)
+    time_range: "HH:MM-HH:MM" for ranges like "between 2 and 4 PM", else null
+    is_today, is_tomorrow: booleans
+    """, """
+    Current datetime: {request_datetime}
+    Email: {email_content}
+    """, max_prompt_tokens=MAX_MODEL_LEN - 256)
+
+SLOT_SUGGESTION_PROMPT = PromptTemplate("slot_suggestion", """
+    Pick the best meeting slot for the request below. Rules: urgent -> earliest slot;
+    a requested time or day -> the matching slot; stay in business hours (9 AM-6 PM);
+    prefer 9-11 AM for important meetings; avoid 12-1 PM if possible.
+    Return ONLY JSON: {"selected_slot_number": <1-based>, "reason": "<short>"}
+    """, """
+    Request: {email_content}
+    Duration: {duration_mins} min. Urgency: {urgency}. Constraints: {time_constraints}. Preferred time: {preferred_time}
+    Slots:
+    {slots}
+    """, max_prompt_tokens=768, max_field_tokens=160)
+
+TEMPLATES = (MEETING_DETAILS_PROMPT, SLOT_SUGGESTION_PROMPT)
+
+def render_chat_prompt(messages):
+    """Raw completion prompt for chat messages in deepseek-llm-chat's template
+
+    Matches what vLLM renders for /v1/chat/completions (the tokenizer adds BOS), so
+    batched /v1/completions calls share the same cached prefix.
+    """
+    parts = []
+    for message in messages:
+        if message["role"] == "system":
+            parts.append(message["content"] + "\n\n")
+        elif message["role"] == "user":
+            parts.append("User: " + message["content"] + "\n\n")
+        else:
+            parts.append("Assistant: " + message["content"] + "<｜end▁of▁sentence｜>")
+    parts.append("Assistant:")
+    return "".join(parts)
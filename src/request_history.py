@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from collections import deque
+from itertools import islice
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+class RequestHistory:
+    """Bounded ring buffer of recent request/response pairs with an optional shared sqlite store
+
+    Retention is by entry count and, optionally, by the serialized size of the retained
+    entries. The buffer is per process; with spill_path set, every entry is also handed to
+    a background writer that stores it zlib-compressed in that database, committing in
+    batches and keeping at most spill_max_entries rows. Point all pre-forked workers at
+    the same file so find() and recent() see every worker's requests. record() never
+    touches the database, and the buffer's lock is never held across a database write.
+    """
+
+    # Most rows the writer inserts per transaction
+    WRITE_BATCH = 256
+
+    def __init__(self, max_entries=1000, max_bytes=None, spill_path=None, spill_max_entries=100000):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.spill_path = spill_path
+        self.spill_max_entries = spill_max_entries
+        self._entries = deque()
+        self._bytes = 0
+        self._lock = Lock()
+        self._db = None
+        self._db_lock = Lock()
+        self._writes = None
+        self._writer = None
+        self.total_recorded = 0
+        self.evictions = 0
+
+        if spill_path:
+            # Shared by every worker process: WAL lets readers run alongside a writer, and
+            # writers wait for each other's locks instead of failing
+            self._db = self._connect()
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS history ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, request_id TEXT, "
+                "recorded_at REAL NOT NULL, entry BLOB NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS history_by_request ON history (request_id)")
+            self._db.commit()
+            self._writes = queue.Queue()
+            self._writer = threading.Thread(target=self._write_loop, daemon=True, name="history-writer")
+            self._writer.start()
+
+    def _connect(self):
+        return sqlite3.connect(self.spill_path, timeout=5, check_same_thread=False)
+
+    @classmethod
+    def from_env(cls):
+        """Build from HISTORY_MAX_ENTRIES, HISTORY_MAX_BYTES and HISTORY_SPILL_PATH
+
+        Without HISTORY_SPILL_PATH each worker only sees the requests it served itself.
+        """
+        max_bytes = os.environ.get("HISTORY_MAX_BYTES")
+        spill_path = os.environ.get("HISTORY_SPILL_PATH")
+        if spill_path and "{pid}" in spill_path:
+            raise ValueError("HISTORY_SPILL_PATH must be one file shared by all workers, not per {pid}")
+        return cls(
+            max_entries=int(os.environ.get("HISTORY_MAX_ENTRIES", 1000)),
+            max_bytes=int(max_bytes) if max_bytes else None,
+            spill_path=spill_path or None,
+            spill_max_entries=int(os.environ.get("HISTORY_SPILL_MAX_ENTRIES", 100000))
+        )
+
+    def record(self, request_data, response_data):
+        """Add one request/response pair, evicting the oldest entries beyond the retention limits"""
+        request_data = request_data or {}
+        entry = {
+            "request_id": request_data.get("Request_id", ""),
+            "recorded_at": time.time(),
+            "input": request_data,
+            "output": response_data
+        }
+        # Sizing needs the JSON; otherwise the writer serializes off the request path
+        serialized = None
+        if self.max_bytes is not None:
+            serialized = json.dumps(entry, separators=(',', ':'))
+        size = len(serialized) if serialized is not None else 0
+
+        with self._lock:
+            self._entries.append((entry, size))
+            self._bytes += size
+            self.total_recorded += 1
+
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                _, old_size = self._entries.popleft()
+                self._bytes -= old_size
+                self.evictions += 1
+
+        if self._writes is not None:
+            self._writes.put((entry, serialized))
+
+    def _write_loop(self):
+        """Background writer: drain queued entries and store each batch in one transaction"""
+        db = self._connect()
+        stopping = False
+        while not stopping:
+            batch = [self._writes.get()]
+            while len(batch) < self.WRITE_BATCH:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            rows = []
+            for item in batch:
+                if item is None:
+                    stopping = True
+                    continue
+                entry, serialized = item
+                if serialized is None:
+                    serialized = json.dumps(entry, separators=(',', ':'))
+                rows.append((entry["request_id"], entry["recorded_at"], zlib.compress(serialized.encode('utf-8'))))
+            try:
+                if rows:
+                    self._store(db, rows)
+            except sqlite3.Error:
+                logger.exception("Failed to store %d history entries", len(rows))
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+        db.close()
+
+    def _store(self, db, rows):
+        """Write a batch of rows to the shared database and trim it (writer thread)"""
+        with db:
+            db.executemany("INSERT INTO history (request_id, recorded_at, entry) VALUES (?, ?, ?)", rows)
+            db.execute(
+                "DELETE FROM history WHERE seq <= (SELECT MAX(seq) FROM history) - ?",
+                (self.spill_max_entries,)
+            )
+
+    def flush(self):
+        """Wait until every entry this process recorded so far is in the shared database"""
+        if self._writes is not None:
+            self._writes.join()
+
+    def find(self, request_id):
+        """Return every retained entry for a request id, newest first
+
+        Reads the shared database when configured (it holds every worker's entries),
+        otherwise this process's buffer.
+        """
+        if self._db is None:
+            with self._lock:
+                return [entry for entry, _ in reversed(self._entries) if entry["request_id"] == request_id]
+        self.flush()
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT entry FROM history WHERE request_id = ? ORDER BY seq DESC", (request_id,)
+            ).fetchall()
+        return [json.loads(zlib.decompress(row[0])) for row in rows]
+
+    def recent(self, limit=20):
+        """Return the most recent entries, newest first (from the shared database when configured)"""
+        if self._db is None:
+            with self._lock:
+                return [entry for entry, _ in islice(reversed(self._entries), limit)]
+        self.flush()
+        with self._db_lock:
+            rows = self._db.execute("SELECT entry FROM history ORDER BY seq DESC LIMIT ?", (limit,)).fetchall()
+        return [json.loads(zlib.decompress(row[0])) for row in rows]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Return retention counters and current memory usage (memory_bytes only tracked with max_bytes)"""
+        spilled = 0
+        if self._db is not None:
+            with self._db_lock:
+                spilled = self._db.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+        with self._lock:
+            return {
+                "total_recorded": self.total_recorded,
+                "memory_entries": len(self._entries),
+                "memory_bytes": self._bytes,
+                "evictions": self.evictions,
+                "spilled_entries": spilled
+            }
+
+    def close(self):
+        """Store any queued entries, stop the writer and close the spill database"""
+        if self._writer is not None:
+            self._writes.put(None)
+            self._writer.join()
+            self._writer = None
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,192 @@
+import re
+import sys
+import os
+from datetime import timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_agent import default_meeting_details
+from utils.time_utils import (
+    WEEKDAY_PATTERN, CLOCK_TIME_PATTERN,
+    parse_datetime_string, get_next_weekday
+)
+
+# "A.M", "a.m." and "p. m." are all normalised to "am"/"pm" before matching
+MERIDIEM_PATTERN = re.compile(r'(?<=[\d\s])([ap])\.?\s?m\b\.?', re.IGNORECASE)
+BARE_HOUR_PATTERN = re.compile(r'(?<![:\d])(\d{1,2})\s*(am|pm)\b')
+# "at 3" with neither minutes nor am/pm
+AT_HOUR_PATTERN = re.compile(r'\bat (\d{1,2})\b(?![:\d])(?!\s*(?:am|pm)\b)')
+TIME_RANGE_PATTERN = re.compile(
+    r'(?:between|from)?\s*(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\s*(?:-|to|and|until|till)\s*'
+    r'(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b'
+)
+# Time-of-day wording the rules do not turn into a time; a request containing it needs the LLM
+TIME_HINT_PATTERN = re.compile(
+    r'\b(?:noon|midday|morning|afternoon|evening|tonight|eod|end of (?:the )?day)\b|\bat \d|'
+    r'\b(?:between|from)\s*\d{1,2}(?::\d{2})?\s*(?:-|to|and|until|till)\s*\d'
+)
+HOURS_PATTERN = re.compile(r'(?<!half )\b(\d+(?:\.\d+)?|an|one|two|three|four)\s*(?:hours?|hrs?)\b')
+MINUTES_PATTERN = re.compile(r'\b(\d+)\s*(?:minutes?|mins?)\b')
+HALF_HOUR_PATTERN = re.compile(r'\bhalf (?:an )?hour\b')
+HOUR_AND_HALF_PATTERN = re.compile(r'\b(?:an|one) hour and a half\b')
+EMAIL_PATTERN = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+URGENT_PATTERN = re.compile(
+    r'\b(urgent|urgently|asap|a\.s\.a\.p|immediately|promptly|important|imp|critical|do or die|high priority)\b'
+)
+# Phrasings the rules cannot represent faithfully; these go to the LLM
+HEDGE_PATTERN = re.compile(
+    r'\b(or|either|except|not|unless|before|after|sometime|some time|flexible|whenever|'
+    r'anytime|any time|later|earlier|instead|reschedule|postpone|next week|this week|weekend)\b'
+)
+
+WORD_NUMBERS = {'an': 1, 'one': 1, 'two': 2, 'three': 3, 'four': 4}
+
+class RuleBasedExtractor:
+    """Deterministic extractor for common meeting phrasings, used before the LLM"""
+
+    def __init__(self, confidence_threshold=0.75):
+        self.confidence_threshold = confidence_threshold
+
+    def extract(self, email_content, request_datetime=None):
+        """Build the meeting details dict from regex rules and return it with a confidence in [0, 1]"""
+        text = MERIDIEM_PATTERN.sub(lambda m: m.group(1).lower() + 'm', email_content.lower())
+        details = default_meeting_details()
+        constraint_parts = []
+
+        # Duration: explicit durations are the strongest signal, a missing one defaults to 30 mins
+        duration_mins = self._extract_duration(text)
+        if duration_mins:
+            details['duration_mins'] = duration_mins
+            confidence = 0.35
+        else:
+            confidence = 0.2
+
+        # Day: exactly one weekday or today/tomorrow
+        weekdays = set(WEEKDAY_PATTERN.findall(text))
+        is_today = bool(re.search(r'\btoday\b', text))
+        is_tomorrow = bool(re.search(r'\btomorrow\b', text))
+        anchors = len(weekdays) + is_today + is_tomorrow
+        if anchors == 1:
+            confidence += 0.35
+            if weekdays:
+                details['day_of_week'] = weekdays.pop()
+                constraint_parts.append(details['day_of_week'].capitalize())
+            elif is_today:
+                details['is_today'] = True
+                constraint_parts.append('today')
+            else:
+                details['is_tomorrow'] = True
+                constraint_parts.append('tomorrow')
+        elif anchors == 0:
+            confidence += 0.1
+
+        # Time: a single clock time, or an explicit range
+        time_confidence, time_phrase = self._extract_time(text, details)
+        confidence += time_confidence
+        if time_phrase:
+            constraint_parts.append(time_phrase)
+
+        if URGENT_PATTERN.search(text):
+            details['urgency'] = 'urgent'
+
+        if HEDGE_PATTERN.search(text):
+            confidence *= 0.5
+
+        details['participants'] = ', '.join(EMAIL_PATTERN.findall(email_content))
+        details['time_constraints'] = ' '.join(constraint_parts)
+        details['preferred_date'] = self._preferred_date(details, request_datetime)
+
+        return details, round(confidence, 2)
+
+    def _extract_duration(self, text):
+        """Return the meeting duration in minutes, or None if not stated"""
+        if HOUR_AND_HALF_PATTERN.search(text):
+            return 90
+        minutes = 0
+        hours_match = HOURS_PATTERN.search(text)
+        if hours_match:
+            value = hours_match.group(1)
+            minutes += int(float(WORD_NUMBERS.get(value, value)) * 60)
+        minutes_match = MINUTES_PATTERN.search(text)
+        if minutes_match:
+            minutes += int(minutes_match.group(1))
+        if not minutes and HALF_HOUR_PATTERN.search(text):
+            minutes = 30
+        return minutes or None
+
+    def _extract_time(self, text, details):
+        """Fill preferred_time/time_range and return (confidence, constraint phrase)"""
+        range_match = TIME_RANGE_PATTERN.search(text)
+        if range_match:
+            end_period = range_match.group(6)
+            start_hour = self._to_24h(int(range_match.group(1)), range_match.group(3) or end_period)
+            end_hour = self._to_24h(int(range_match.group(4)), end_period)
+            start_minute = int(range_match.group(2) or 0)
+            end_minute = int(range_match.group(5) or 0)
+            if not (self._valid_time(start_hour, start_minute) and self._valid_time(end_hour, end_minute)):
+                # e.g. "13 to 15 pm": leave it to the LLM
+                return 0.0, ''
+            if start_hour < end_hour:
+                details['time_range'] = f"{start_hour:02d}:{start_minute:02d}-{end_hour:02d}:{end_minute:02d}"
+                return 0.3, f"between {details['time_range']}"
+            return 0.05, ''
+
+        times = set()
+        ambiguous = False
+        for hour, minute, period in CLOCK_TIME_PATTERN.findall(text):
+            if not period:
+                # "at 3:00" most likely means the afternoon during business hours
+                ambiguous = True
+            times.add((self._to_24h(int(hour), period), int(minute)))
+        for hour, period in BARE_HOUR_PATTERN.findall(text):
+            times.add((self._to_24h(int(hour), period), 0))
+        for hour in AT_HOUR_PATTERN.findall(text):
+            if int(hour) <= 23:
+                # Same reading as "at 3:00" without am/pm
+                ambiguous = True
+                times.add((self._to_24h(int(hour), None), 0))
+
+        if not all(self._valid_time(hour, minute) for hour, minute in times):
+            # "14:30 pm", "13pm", "10:75": not a clock time; leave it to the LLM
+            return 0.0, ''
+        if not times:
+            # No time is only a confident reading if nothing in the text looks like one
+            return (0.0 if TIME_HINT_PATTERN.search(text) else 0.2), ''
+        if len(times) > 1:
+            return 0.05, ''
+
+        hour, minute = times.pop()
+        details['preferred_time'] = f"{hour:02d}:{minute:02d}"
+        details['is_specific_time'] = True
+        return (0.1 if ambiguous else 0.3), f"at {details['preferred_time']}"
+
+    def _to_24h(self, hour, period):
+        """Convert a 12-hour clock hour to 24-hour format; None if it is not a valid hour"""
+        period = period.replace('.', '') if period else None
+        if period and not 1 <= hour <= 12:
+            return None
+        if period == 'pm' and hour != 12:
+            return hour + 12
+        if period == 'am' and hour == 12:
+            return 0
+        if period is None and 1 <= hour <= 7:
+            return hour + 12
+        return hour
+
+    def _valid_time(self, hour, minute):
+        return hour is not None and 0 <= hour <= 23 and 0 <= minute <= 59
+
+    def _preferred_date(self, details, request_datetime):
+        """Resolve the preferred date relative to the request datetime"""
+        if not request_datetime:
+            return None
+        try:
+            request_dt = parse_datetime_string(request_datetime)
+        except ValueError:
+            return None
+        if details['day_of_week']:
+            return get_next_weekday(request_dt, details['day_of_week']).date().isoformat()
+        if details['is_today']:
+            return request_dt.date().isoformat()
+        if details['is_tomorrow']:
+            return (request_dt.date() + timedelta(days=1)).isoformat()
+        return None
@@ -0,0 +1,203 @@
+import heapq
+from array import array
+from datetime import datetime
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.intervals import IntervalSet, IST
+from utils.time_utils import parse_datetime_string
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+DAY_SECONDS = 86400
+
+class SlotEngine:
+    """Batched candidate-slot generation and scoring on epoch-second arrays
+
+    Candidates are produced as one array('q') of start times; business hours, preferred
+    hour, time range, weekday and urgency rules are applied as per-hour/per-weekday lookup
+    tables, and only the top-k candidates are turned back into slot dicts.
+    """
+
+    def __init__(self, step_mins=30, business_start_hour=9, business_end_hour=18, tz=IST):
+        self.step = step_mins * 60
+        self.business_start_hour = business_start_hour
+        self.business_end_hour = business_end_hour
+        self.tz = tz
+        self.offset = int(tz.utcoffset(None).total_seconds())
+
+    def business_windows(self, first_ts, last_ts):
+        """Business-hours windows (local time) for every day touching [first_ts, last_ts]"""
+        windows = IntervalSet()
+        first_day = (first_ts + self.offset) // DAY_SECONDS
+        last_day = (last_ts + self.offset) // DAY_SECONDS
+        for day in range(first_day, last_day + 1):
+            midnight = day * DAY_SECONDS - self.offset
+            windows.starts.append(midnight + self.business_start_hour * 3600)
+            windows.ends.append(midnight + self.business_end_hour * 3600)
+        return windows
+
+    def candidate_starts(self, free_intervals, duration_mins, datetime_pref=None):
+        """All meeting start times that fit in the free intervals and start within business hours
+
+        Starts step from the beginning of each free interval, as the per-slot walk did.
+        """
+        duration = int(duration_mins) * 60
+        starts = array('q')
+
+        # Start positions allowed by each free interval: [start, end - duration]
+        positions = IntervalSet()
+        for start, end in free_intervals:
+            if end - duration >= start:
+                positions.starts.append(start)
+                positions.ends.append(end - duration + 1)
+        if not positions:
+            return starts
+
+        allowed = positions.intersection(self.business_windows(positions.starts[0], positions.ends[-1]))
+
+        origin_index = 0
+        for low, high in allowed:
+            # Step from the start of the free interval this piece came from
+            while positions.ends[origin_index] <= low:
+                origin_index += 1
+            origin = positions.starts[origin_index]
+            first = origin + -(-(low - origin) // self.step) * self.step
+            starts.extend(range(first, high, self.step))
+
+        # A specific requested time restricts candidates to that hour
+        if datetime_pref and datetime_pref.get('is_specific_time'):
+            preferred_hour, _ = self._preferred_time(datetime_pref)
+            offset = self.offset
+            starts = array('q', [t for t in starts if (t + offset) // 3600 % 24 == preferred_hour])
+
+        return starts
+
+    def score(self, starts, datetime_pref, request_ts):
+        """Score every candidate start; returns a list aligned with starts"""
+        datetime_pref = datetime_pref or {}
+        offset = self.offset
+        hour_scores = self._hour_scores(datetime_pref)
+        weekday_scores = self._weekday_scores(datetime_pref)
+
+        scores = [
+            hour_scores[(t + offset) // 3600 % 24] + weekday_scores[((t + offset) // DAY_SECONDS + 3) % 7]
+            for t in starts
+        ]
+
+        # Exact minute match on top of the hour match for a specific time
+        if datetime_pref.get('is_specific_time'):
+            preferred_hour, preferred_minute = self._preferred_time(datetime_pref)
+            exact = preferred_hour * 60 + preferred_minute
+            for i, t in enumerate(starts):
+                if (t + offset) // 60 % 1440 == exact:
+                    scores[i] += 100
+
+        # Urgent meetings favour earlier slots
+        if datetime_pref.get('urgency') == 'urgent':
+            for i, t in enumerate(starts):
+                seconds_from_now = t - request_ts
+                if seconds_from_now < 24 * 3600:
+                    scores[i] += 100
+                elif seconds_from_now < 48 * 3600:
+                    scores[i] += 50
+                else:
+                    scores[i] += 25
+
+        return scores
+
+    def rank(self, starts, duration_mins, datetime_pref, request_datetime, k=5):
+        """Score candidates and return (top k scored slot dicts best first, aggregate stats)"""
+        request_ts = int(parse_datetime_string(request_datetime).timestamp())
+        scores = self.score(starts, datetime_pref, request_ts)
+        top = self.top_k(scores, starts, k)
+        return [self.to_scored_slot(starts[i], scores[i], duration_mins) for i in top], self.score_stats(scores)
+
+    def top_k(self, scores, starts, k):
+        """Indices of the k best candidates without sorting them all; ties go to the earliest start"""
+        return heapq.nsmallest(k, range(len(scores)), key=lambda i: (-scores[i], starts[i]))
+
+    def score_stats(self, scores):
+        """Aggregate statistics over all candidate scores"""
+        if not scores:
+            return {'candidates': 0}
+        best = max(scores)
+        return {
+            'candidates': len(scores),
+            'max_score': best,
+            'min_score': min(scores),
+            'mean_score': round(sum(scores) / len(scores), 2),
+            'top_score_ties': scores.count(best)
+        }
+
+    def to_scored_slot(self, start_ts, score, duration_mins):
+        """Convert one candidate back into the scored slot dict format"""
+        slot_dt = datetime.fromtimestamp(start_ts, self.tz)
+        slot_end = datetime.fromtimestamp(start_ts + int(duration_mins) * 60, self.tz)
+        return {
+            'slot': {'start': slot_dt.isoformat(), 'end': slot_end.isoformat()},
+            'score': score,
+            'datetime': slot_dt
+        }
+
+    def to_slots(self, starts, duration_mins):
+        """Convert candidate starts to {'start', 'end'} slot dicts"""
+        duration = int(duration_mins) * 60
+        return [
+            {
+                'start': datetime.fromtimestamp(t, self.tz).isoformat(),
+                'end': datetime.fromtimestamp(t + duration, self.tz).isoformat()
+            }
+            for t in starts
+        ]
+
+    def _preferred_time(self, datetime_pref):
+        """(hour, minute) of the preferred time, defaulting to 10:00"""
+        preferred_time = datetime_pref.get('preferred_time') or '10:00'
+        parts = preferred_time.split(':')
+        return int(parts[0]), int(parts[1]) if len(parts) > 1 else 0
+
+    def _hour_scores(self, datetime_pref):
+        """Score contribution of each local hour of day"""
+        scores = [0] * 24
+        urgent = datetime_pref.get('urgency') == 'urgent'
+
+        # Specific time preference: hour match (exact minute match is added in score)
+        if datetime_pref.get('is_specific_time'):
+            preferred_hour, _ = self._preferred_time(datetime_pref)
+            scores[preferred_hour] += 100
+
+        # Requested time range, e.g. "14:00-16:00"
+        time_range = datetime_pref.get('time_range')
+        if time_range and '-' in time_range:
+            try:
+                start_str, end_str = time_range.split('-')
+                range_start_hour = int(start_str.split(':')[0])
+                range_end_hour = int(end_str.split(':')[0])
+            except ValueError:
+                range_start_hour = range_end_hour = 0
+            for hour in range(max(range_start_hour, 0), min(range_end_hour, 24)):
+                scores[hour] += 150
+                # Prefer earlier slots in the range for urgent meetings
+                if urgent and hour == range_start_hour:
+                    scores[hour] += 50
+
+        for hour in range(24):
+            # Morning slots (9-11 AM) are generally preferred
+            if 9 <= hour < 11:
+                scores[hour] += 30
+            # Avoid early morning and late afternoon
+            elif hour < 9:
+                scores[hour] -= 20
+            elif hour >= 16:
+                scores[hour] -= 10
+            # Avoid slots right after lunch
+            if hour == 13:
+                scores[hour] -= 15
+
+        return scores
+
+    def _weekday_scores(self, datetime_pref):
+        """Score contribution of each weekday (Monday first)"""
+        day_of_week = datetime_pref.get('day_of_week')
+        return [150 if day == day_of_week else 0 for day in WEEKDAYS]
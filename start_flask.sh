@@ -1,6 +1,6 @@
 #!/bin/bash
 echo "Starting AI Scheduling Assistant..."
-echo "Server will be available at http://0.0.0.0:5000"
+echo "Server will be available at http://0.0.0.0:${PORT:-5001}"
 echo ""
 
 # Check if vLLM is running
@@ -10,4 +10,11 @@ if ! curl -s http://localhost:3000/health > /dev/null 2>&1; then
     echo ""
 fi
 
-python3 main_submission.py
+# Use gunicorn pre-fork workers when available, otherwise the threaded dev server
+# Worker/thread counts: SCHEDULER_WORKERS (default 4), SCHEDULER_THREADS (default 8)
+if python3 -c "import gunicorn" 2>/dev/null; then
+    python3 main_submission.py --production
+else
+    echo "⚠️  gunicorn not installed, using the development server (pip install gunicorn)"
+    python3 main_submission.py
+fi
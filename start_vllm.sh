@@ -31,6 +31,7 @@ HIP_VISIBLE_DEVICES=0 vllm serve /home/user/Models/deepseek-ai/deepseek-llm-7b-c
     --disable-log-requests \
     --dtype float16 \
     --max-model-len 2048 \
+    --enable-prefix-caching \
     --tensor-parallel-size 1 \
     --host 0.0.0.0 \
     --port 3000 \
@@ -0,0 +1,76 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+from array import array
+
+import pytest
+
+from utils.intervals import IntervalSet
+
+def make(pairs):
+    return IntervalSet(array('q', [start for start, _ in pairs]), array('q', [end for _, end in pairs]))
+
+def covered(pairs):
+    """Unit cells [t, t+1) covered by any interval, the brute-force reference"""
+    return {t for start, end in pairs for t in range(start, end)}
+
+def runs(cells):
+    """Maximal runs of consecutive cells as (start, end) pairs"""
+    result = []
+    for t in sorted(cells):
+        if result and result[-1][1] == t:
+            result[-1][1] = t + 1
+        else:
+            result.append([t, t + 1])
+    return [tuple(run) for run in result]
+
+def random_pairs(rng, count, horizon=100):
+    pairs = []
+    for _ in range(count):
+        start = rng.randrange(horizon)
+        pairs.append((start, start + rng.randrange(1, 20)))
+    return pairs
+
+def test_merged_joins_overlapping_and_touching():
+    merged = make([(10, 20), (0, 5), (5, 8), (15, 30), (40, 50)]).merged()
+    assert list(merged) == [(0, 8), (10, 30), (40, 50)]
+
+def test_merged_of_empty_set():
+    assert list(IntervalSet().merged()) == []
+
+def test_gaps_within_window():
+    busy = make([(10, 20), (30, 40)])
+    assert list(busy.gaps(0, 50)) == [(0, 10), (20, 30), (40, 50)]
+    assert list(busy.gaps(15, 35)) == [(20, 30)]
+    assert list(busy.gaps(0, 50, min_length=11)) == []
+
+def test_gaps_of_empty_set_is_the_window():
+    assert list(IntervalSet().gaps(5, 25)) == [(5, 25)]
+
+def test_intersection():
+    a = make([(0, 10), (20, 30)])
+    b = make([(5, 25), (28, 40)])
+    assert list(a.intersection(b)) == [(5, 10), (20, 25), (28, 30)]
+    assert list(a.intersection(IntervalSet())) == []
+
+@pytest.mark.parametrize("seed", range(50))
+def test_against_brute_force(seed):
+    rng = random.Random(seed)
+    a_pairs = random_pairs(rng, rng.randrange(0, 8))
+    b_pairs = random_pairs(rng, rng.randrange(0, 8))
+    a, b = make(a_pairs).merged(), make(b_pairs).merged()
+
+    assert list(a) == runs(covered(a_pairs))
+    assert list(a.intersection(b)) == runs(covered(a_pairs) & covered(b_pairs))
+
+    window_start, window_end = 10, 110
+    min_length = rng.randrange(1, 10)
+    free = covered([(window_start, window_end)]) - covered(a_pairs)
+    expected = [run for run in runs(free) if run[1] - run[0] >= min_length]
+    assert list(a.gaps(window_start, window_end, min_length)) == expected
+
+def test_to_dicts_round_trips_iso_strings():
+    periods = [{'start': "2025-07-21T09:00:00+05:30", 'end': "2025-07-21T10:30:00+05:30"}]
+    assert IntervalSet.from_periods(periods).to_dicts() == periods
@@ -0,0 +1,72 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+
+import pytest
+
+from src.llm_cache import LLMResponseCache
+
+def test_key_depends_on_every_input():
+    messages = [{"role": "user", "content": "hi"}]
+    key = LLMResponseCache.make_key("m", messages, 10, temperature=0.0)
+    assert key == LLMResponseCache.make_key("m", [{"content": "hi", "role": "user"}], 10, temperature=0.0)
+    assert key != LLMResponseCache.make_key("other", messages, 10, temperature=0.0)
+    assert key != LLMResponseCache.make_key("m", messages, 11, temperature=0.0)
+    assert key != LLMResponseCache.make_key("m", messages, 10, temperature=0.0, schema={"type": "object"})
+
+def test_lru_evicts_least_recently_used():
+    cache = LLMResponseCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = LLMResponseCache(ttl_seconds=10)
+    cache.set("a", "1")
+    now[0] += 9
+    assert cache.get("a") == "1"
+    now[0] += 2
+    assert cache.get("a") is None
+    assert cache.stats()["memory_entries"] == 0
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    LLMResponseCache(db_path=db_path).set("a", '{"x": 1}')
+    cache = LLMResponseCache(db_path=db_path)
+    assert cache.get("a") == '{"x": 1}'
+    assert cache.stats()["disk_hits"] == 1
+    # Promoted into memory, so the second hit does not touch disk
+    assert cache.get("a") == '{"x": 1}'
+    assert cache.stats()["disk_hits"] == 1
+
+def test_expired_sqlite_rows_are_purged_while_running(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = LLMResponseCache(ttl_seconds=10, db_path=str(tmp_path / "cache.db"), purge_interval=60)
+    cache.set("old", "1")
+    now[0] += 61
+    cache.set("new", "2")
+    keys = [row[0] for row in cache._db.execute("SELECT key FROM responses")]
+    assert keys == ["new"]
+
+@pytest.mark.parametrize("reply, cached", [
+    ('{"selected_slot_number": 2}', True),
+    ('{"selected_slot_number": 2', False),
+    ('{"a": {"b"}', False),
+    ('no json here', False),
+])
+def test_agent_caches_only_parsable_replies(reply, cached):
+    from src.ai_agent import AISchedulingAgent
+    cache = LLMResponseCache()
+    agent = AISchedulingAgent(cache=cache)
+    agent._cache_store("key", reply)
+    assert (cache.get("key") == reply) is cached
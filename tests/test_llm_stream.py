@@ -0,0 +1,109 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from src.llm_stream import JsonObjectScanner, aread_json_object, read_json_object
+from src.llm_transport import CircuitBreaker
+
+OBJECT = '{"title": "Sync {weekly} \\"standup\\"", "path": "C:\\\\", "nested": {"a": [1, {"b": "}"}]}}'
+
+def split_randomly(text, rng):
+    cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randrange(1, 12))))
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+def feed_all(pieces):
+    scanner = JsonObjectScanner()
+    for piece in pieces:
+        if scanner.feed(piece) is not None:
+            break
+    return scanner
+
+def test_whole_object_in_one_piece():
+    scanner = JsonObjectScanner()
+    assert scanner.feed(OBJECT) == OBJECT
+    assert json.loads(scanner.object_text())["nested"]["a"][1]["b"] == "}"
+
+@pytest.mark.parametrize("seed", range(50))
+def test_object_split_across_chunks(seed):
+    pieces = split_randomly('Sure! Here it is: ' + OBJECT + ' Hope this helps {', random.Random(seed))
+    scanner = feed_all(pieces)
+    assert scanner.complete
+    assert scanner.object_text() == OBJECT
+
+def test_one_character_at_a_time():
+    scanner = feed_all(list(OBJECT))
+    assert scanner.object_text() == OBJECT
+
+def test_quotes_before_the_object_are_not_strings():
+    scanner = JsonObjectScanner()
+    assert scanner.feed('The "answer" is ') is None
+    assert scanner.feed('{"a": 1}') == '{"a": 1}'
+
+def test_incomplete_object():
+    scanner = feed_all(['{"a": "}', '"'])
+    assert not scanner.complete
+    assert scanner.object_text() is None
+
+def test_feed_after_complete_returns_the_object():
+    scanner = JsonObjectScanner()
+    scanner.feed('{"a": 1}')
+    assert scanner.feed(' trailing') == '{"a": 1}'
+
+def chunk(text, finish_reason=None):
+    return SimpleNamespace(choices=[SimpleNamespace(text=text, finish_reason=finish_reason)])
+
+class FakeStream:
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for item in self.chunks:
+            self.read += 1
+            yield item
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        self.closed = True
+
+class FakeAsyncStream(FakeStream):
+    async def __aiter__(self):
+        for item in self:
+            yield item
+
+    async def close(self):
+        self.closed = True
+
+def test_read_stops_once_the_object_closes():
+    stream = FakeStream([chunk('Sure: {"a": '), chunk('{"b": "}"}}'), chunk(' and more'), chunk('', 'stop')])
+    assert read_json_object(stream) == '{"a": {"b": "}"}}'
+    assert stream.read == 2
+    assert stream.closed
+
+def test_read_returns_the_text_without_an_object():
+    stream = FakeStream([chunk(' no json '), chunk('here', 'stop')])
+    assert read_json_object(stream) == 'no json here'
+
+def test_read_error_counts_as_a_breaker_failure():
+    breaker = CircuitBreaker(failure_threshold=5)
+    stream = FakeStream([chunk('{"a": ')], error=ConnectionError("reset"))
+    with pytest.raises(ConnectionError):
+        read_json_object(stream, breaker=breaker)
+    assert breaker.failures == 1
+    assert stream.closed
+
+def test_async_read_stops_once_the_object_closes():
+    stream = FakeAsyncStream([chunk('{"a": 1'), chunk('}'), chunk(' more')])
+    assert asyncio.run(aread_json_object(stream)) == '{"a": 1}'
+    assert stream.read == 2
+    assert stream.closed
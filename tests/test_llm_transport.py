@@ -0,0 +1,135 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import time
+
+import httpx
+import openai
+import pytest
+
+from src.llm_transport import CircuitBreaker, LLMTransport, LLMUnavailableError, request_deadline
+
+REQUEST = httpx.Request("POST", "http://localhost:3000/v1/completions")
+
+def connection_error():
+    return openai.APIConnectionError(request=REQUEST)
+
+def bad_request():
+    return openai.BadRequestError("bad request", response=httpx.Response(400, request=REQUEST), body=None)
+
+def raising(error):
+    def create(**kwargs):
+        raise error
+    return create
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+def half_open_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.state == "half_open"
+    return breaker
+
+def test_opens_after_threshold_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert not breaker.available()
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = half_open_breaker(clock)
+    assert breaker.available()
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert not breaker.available()
+
+def test_probe_success_closes(clock):
+    breaker = half_open_breaker(clock)
+    breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+def test_probe_failure_reopens(clock):
+    breaker = half_open_breaker(clock)
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock[0] += 29
+    assert not breaker.allow()
+    clock[0] += 1
+    assert breaker.allow()
+
+def test_release_hands_back_the_probe(clock):
+    breaker = half_open_breaker(clock)
+    breaker.allow()
+    breaker.release()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+def test_connection_errors_are_retried_and_counted(clock, monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    transport = LLMTransport(max_attempts=2, breaker=CircuitBreaker(failure_threshold=5))
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        raise connection_error()
+
+    with pytest.raises(openai.APIConnectionError):
+        transport.call(create, model="m")
+    assert len(calls) == 2
+    assert transport.breaker.failures == 2
+
+def test_status_error_counts_as_vllm_answering(clock):
+    transport = LLMTransport(breaker=half_open_breaker(clock))
+    with pytest.raises(openai.BadRequestError):
+        transport.call(raising(bad_request()))
+    assert transport.breaker.state == "closed"
+
+def test_local_error_releases_the_probe(clock):
+    transport = LLMTransport(breaker=half_open_breaker(clock))
+    with pytest.raises(ValueError):
+        transport.call(raising(ValueError("bad kwargs")))
+    assert transport.breaker.state == "half_open"
+    assert transport.breaker.failures == 2
+    assert transport.breaker.allow()
+
+def test_cancelled_async_call_releases_the_probe(clock):
+    transport = LLMTransport(breaker=half_open_breaker(clock))
+
+    async def create(**kwargs):
+        raise asyncio.CancelledError()
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(transport.acall(create))
+    assert transport.breaker.allow()
+
+def test_spent_deadline_releases_the_probe_without_closing(clock):
+    transport = LLMTransport(reserve_seconds=0.5, breaker=half_open_breaker(clock))
+    with request_deadline(0.4):
+        with pytest.raises(LLMUnavailableError):
+            transport.call(raising(AssertionError("no call should go out")))
+    assert transport.breaker.state == "half_open"
+    assert transport.breaker.allow()
+
+def test_timeout_is_capped_by_the_deadline(clock):
+    transport = LLMTransport(call_timeout=10.0, reserve_seconds=0.5)
+    with request_deadline(3.0):
+        assert transport.call(lambda timeout: timeout) == pytest.approx(2.5)
+    assert transport.call(lambda timeout: timeout) == 10.0
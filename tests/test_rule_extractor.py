@@ -0,0 +1,65 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.rule_extractor import RuleBasedExtractor
+
+REQUEST_DATETIME = "19-07-2025T12:34:55"
+
+@pytest.fixture
+def extractor():
+    return RuleBasedExtractor()
+
+def test_bare_at_hour_is_parsed_like_clock_time(extractor):
+    details, confidence = extractor.extract("Let's meet Wednesday at 3 for 45 minutes", REQUEST_DATETIME)
+    assert details['preferred_time'] == "15:00"
+    assert details['is_specific_time'] is True
+    assert details['duration_mins'] == 45
+    # Same credit as "at 3:00" without am/pm
+    _, clock_confidence = extractor.extract("Let's meet Wednesday at 3:00 for 45 minutes", REQUEST_DATETIME)
+    assert confidence == clock_confidence
+
+@pytest.mark.parametrize("email", [
+    "Let's meet on Friday from 10 to 12 for an hour",
+    "Thursday at noon for 30 mins",
+    "Can we do Monday morning for 30 minutes?",
+    "Tuesday afternoon, 1 hour please",
+    "Let's talk Wednesday evening for 30 minutes",
+    "Need 30 minutes on Friday before EOD",
+])
+def test_unparsed_time_wording_is_not_confident(extractor, email):
+    details, confidence = extractor.extract(email, REQUEST_DATETIME)
+    assert details['preferred_time'] is None
+    assert details['time_range'] is None
+    assert confidence < extractor.confidence_threshold
+
+def test_no_time_wording_stays_confident(extractor):
+    details, confidence = extractor.extract("Hi team, let's meet on Thursday for 30 minutes.", REQUEST_DATETIME)
+    assert details['preferred_time'] is None
+    assert confidence >= extractor.confidence_threshold
+
+def test_range_with_meridiem_still_parsed(extractor):
+    details, confidence = extractor.extract("Urgent: 1 hour call on Friday between 2 and 4 pm", REQUEST_DATETIME)
+    assert details['time_range'] == "14:00-16:00"
+    assert confidence >= extractor.confidence_threshold
+
+@pytest.mark.parametrize("email", [
+    "Let's meet on Monday at 14:30 pm for 30 minutes",
+    "Let's meet on Monday at 13pm for 30 minutes",
+    "Let's meet on Monday at 10:75 am for 30 minutes",
+    "Let's meet on Monday at 25:00 for 30 minutes",
+    "1 hour call on Friday between 13 and 15 pm",
+])
+def test_out_of_range_times_are_not_confident(extractor, email):
+    details, confidence = extractor.extract(email, REQUEST_DATETIME)
+    assert details['preferred_time'] is None
+    assert details['time_range'] is None
+    assert confidence < extractor.confidence_threshold
+
+def test_noon_and_midnight_meridiem(extractor):
+    details, _ = extractor.extract("Meet Monday at 12 pm for 30 minutes", REQUEST_DATETIME)
+    assert details['preferred_time'] == "12:00"
+    details, _ = extractor.extract("Meet Monday at 12:15 am for 30 minutes", REQUEST_DATETIME)
+    assert details['preferred_time'] == "00:15"
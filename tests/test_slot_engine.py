@@ -0,0 +1,119 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.slot_engine import SlotEngine
+from utils.intervals import IntervalSet, IST
+from utils.time_utils import is_within_business_hours, parse_datetime_string
+
+REQUEST_DATETIME = "19-07-2025T12:34:55"
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+def legacy_filter(free_slots, duration_mins, datetime_pref):
+    """The per-slot 30-minute walk SlotEngine.candidate_starts replaced"""
+    suitable = []
+    for slot in free_slots:
+        current = datetime.fromisoformat(slot['start'])
+        slot_end = datetime.fromisoformat(slot['end'])
+        while current + timedelta(minutes=duration_mins) <= slot_end:
+            if is_within_business_hours(current):
+                if datetime_pref.get('is_specific_time'):
+                    preferred_hour = int((datetime_pref.get('preferred_time') or '10:00').split(':')[0])
+                    if current.hour == preferred_hour:
+                        suitable.append(current)
+                else:
+                    suitable.append(current)
+            current += timedelta(minutes=30)
+    return suitable
+
+def legacy_score(slot_dt, datetime_pref, request_dt):
+    """The per-slot scorer SlotEngine.score replaced"""
+    score = 0
+    if datetime_pref.get('urgency') == 'urgent':
+        hours_from_now = (slot_dt - request_dt).total_seconds() / 3600
+        score += 100 if hours_from_now < 24 else 50 if hours_from_now < 48 else 25
+    if datetime_pref.get('is_specific_time'):
+        preferred_time = datetime_pref.get('preferred_time') or '10:00'
+        preferred_hour = int(preferred_time.split(':')[0])
+        preferred_minute = int(preferred_time.split(':')[1]) if ':' in preferred_time else 0
+        if slot_dt.hour == preferred_hour and slot_dt.minute == preferred_minute:
+            score += 200
+        elif slot_dt.hour == preferred_hour:
+            score += 100
+    time_range = datetime_pref.get('time_range')
+    if time_range:
+        start_str, end_str = time_range.split('-')
+        range_start_hour = int(start_str.split(':')[0])
+        range_end_hour = int(end_str.split(':')[0])
+        if range_start_hour <= slot_dt.hour < range_end_hour:
+            score += 150
+            if datetime_pref.get('urgency') == 'urgent' and slot_dt.hour == range_start_hour:
+                score += 50
+    if datetime_pref.get('day_of_week') and WEEKDAYS[slot_dt.weekday()] == datetime_pref['day_of_week']:
+        score += 150
+    if 9 <= slot_dt.hour < 11:
+        score += 30
+    elif slot_dt.hour < 9:
+        score -= 20
+    elif slot_dt.hour >= 16:
+        score -= 10
+    if slot_dt.hour == 13:
+        score -= 15
+    return score
+
+def random_free_slots(rng):
+    """Sorted, disjoint free periods over a week, on 5-minute boundaries"""
+    current = datetime(2025, 7, 21, 0, 0, tzinfo=IST) + timedelta(minutes=5 * rng.randrange(0, 288))
+    slots = []
+    for _ in range(rng.randrange(0, 12)):
+        current += timedelta(minutes=5 * rng.randrange(1, 200))
+        end = current + timedelta(minutes=5 * rng.randrange(1, 120))
+        slots.append({'start': current.isoformat(), 'end': end.isoformat()})
+        current = end
+    return slots
+
+def random_preferences(rng):
+    pref = {'urgency': rng.choice(['normal', 'urgent'])}
+    if rng.random() < 0.4:
+        pref['is_specific_time'] = True
+        pref['preferred_time'] = f"{rng.randrange(8, 18):02d}:{rng.choice([0, 15, 30]):02d}"
+    if rng.random() < 0.4:
+        start = rng.randrange(8, 17)
+        pref['time_range'] = f"{start:02d}:00-{rng.randrange(start + 1, 19):02d}:00"
+    if rng.random() < 0.5:
+        pref['day_of_week'] = rng.choice(WEEKDAYS)
+    return pref
+
+@pytest.mark.parametrize("seed", range(300))
+def test_matches_legacy_walk_and_scorer(seed):
+    rng = random.Random(seed)
+    engine = SlotEngine()
+    free_slots = random_free_slots(rng)
+    duration_mins = rng.choice([15, 30, 45, 60, 90])
+    pref = random_preferences(rng)
+    request_dt = parse_datetime_string(REQUEST_DATETIME)
+
+    expected_starts = legacy_filter(free_slots, duration_mins, pref)
+    starts = engine.candidate_starts(IntervalSet.from_periods(free_slots).merged(), duration_mins, pref)
+    assert [datetime.fromtimestamp(t, IST) for t in starts] == expected_starts
+
+    legacy = sorted(
+        ((legacy_score(dt, pref, request_dt), dt) for dt in expected_starts), key=lambda item: item[0], reverse=True
+    )[:5]
+    top_slots, stats = engine.rank(starts, duration_mins, pref, REQUEST_DATETIME, k=5)
+    assert [(s['score'], s['datetime']) for s in top_slots] == legacy
+    assert stats['candidates'] == len(expected_starts)
+
+def test_top_k_prefers_earliest_on_ties():
+    engine = SlotEngine()
+    assert engine.top_k([5, 9, 9, 1], [40, 30, 20, 10], 2) == [2, 1]
+
+def test_score_stats():
+    assert SlotEngine().score_stats([]) == {'candidates': 0}
+    stats = SlotEngine().score_stats([10, 30, 30, -5])
+    assert stats == {'candidates': 4, 'max_score': 30, 'min_score': -5, 'mean_score': 16.25, 'top_score_ties': 2}
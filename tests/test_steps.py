@@ -0,0 +1,83 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from functools import partial
+
+import pytest
+
+from utils.steps import arun_steps, run_steps
+
+def double(value):
+    return value * 2
+
+async def adouble(value):
+    return value * 2
+
+def fail():
+    raise ValueError("boom")
+
+async def afail():
+    raise ValueError("boom")
+
+def pipeline(step, failing_step, cleanup):
+    """Two steps, one that fails and is handled, and cleanup that must always run"""
+    try:
+        first = yield partial(step, 2)
+        try:
+            yield failing_step
+        except ValueError as e:
+            handled = str(e)
+        nested = yield from nested_steps(step)
+        return first, handled, nested
+    finally:
+        cleanup.append("done")
+
+def nested_steps(step):
+    return (yield partial(step, 5))
+
+def test_run_steps_sends_results_and_throws_errors():
+    cleanup = []
+    assert run_steps(pipeline(double, fail, cleanup)) == (4, "boom", 10)
+    assert cleanup == ["done"]
+
+def test_arun_steps_awaits_each_step():
+    cleanup = []
+    assert asyncio.run(arun_steps(pipeline(adouble, afail, cleanup))) == (4, "boom", 10)
+    assert cleanup == ["done"]
+
+def test_unhandled_error_propagates_after_cleanup():
+    cleanup = []
+
+    def steps():
+        try:
+            yield fail
+        finally:
+            cleanup.append("done")
+
+    with pytest.raises(ValueError):
+        run_steps(steps())
+    assert cleanup == ["done"]
+
+def test_cancellation_closes_the_generator():
+    cleanup = []
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    def steps():
+        try:
+            yield hang
+        finally:
+            cleanup.append("closed")
+
+    async def main():
+        task = asyncio.ensure_future(arun_steps(steps()))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert cleanup == ["closed"]
@@ -0,0 +1,108 @@
+from array import array
+from datetime import datetime, timedelta, timezone
+
+from utils.time_utils import to_epoch_seconds
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+class IntervalSet:
+    """Half-open time intervals as epoch seconds in two parallel array('q') columns
+
+    Timestamps are parsed once on the way in and only formatted back to ISO strings
+    at the output boundary (to_dicts).
+    """
+    __slots__ = ('starts', 'ends')
+
+    def __init__(self, starts=None, ends=None):
+        self.starts = starts if starts is not None else array('q')
+        self.ends = ends if ends is not None else array('q')
+
+    @classmethod
+    def from_periods(cls, periods, start_key='start', end_key='end'):
+        """Build from dicts of ISO strings such as {'start': ..., 'end': ...}"""
+        intervals = cls()
+        for period in periods:
+            intervals.starts.append(to_epoch_seconds(period[start_key]))
+            intervals.ends.append(to_epoch_seconds(period[end_key]))
+        return intervals
+
+    @classmethod
+    def from_events(cls, events):
+        """Build from calendar events in the output format (StartTime/EndTime)"""
+        return cls.from_periods(events, 'StartTime', 'EndTime')
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return zip(self.starts, self.ends)
+
+    def extend(self, other):
+        """Append another set's intervals (the result is unsorted)"""
+        self.starts.extend(other.starts)
+        self.ends.extend(other.ends)
+
+    def merged(self):
+        """Return the sorted union, joining overlapping and touching intervals"""
+        result = IntervalSet()
+        if not self.starts:
+            return result
+
+        order = sorted(range(len(self.starts)), key=self.starts.__getitem__)
+        current_start = self.starts[order[0]]
+        current_end = self.ends[order[0]]
+        for i in order[1:]:
+            start, end = self.starts[i], self.ends[i]
+            if start <= current_end:
+                if end > current_end:
+                    current_end = end
+            else:
+                result.starts.append(current_start)
+                result.ends.append(current_end)
+                current_start, current_end = start, end
+        result.starts.append(current_start)
+        result.ends.append(current_end)
+        return result
+
+    def gaps(self, window_start, window_end, min_length=0):
+        """Return the gaps of at least min_length seconds within a window (self must be merged)"""
+        result = IntervalSet()
+        current = window_start
+        for start, end in zip(self.starts, self.ends):
+            if start >= window_end:
+                break
+            if current + min_length <= start:
+                result.starts.append(current)
+                result.ends.append(start)
+            if end > current:
+                current = end
+        if current + min_length <= window_end:
+            result.starts.append(current)
+            result.ends.append(window_end)
+        return result
+
+    def intersection(self, other):
+        """Return the overlap of two merged sets"""
+        result = IntervalSet()
+        i = j = 0
+        while i < len(self.starts) and j < len(other.starts):
+            start = max(self.starts[i], other.starts[j])
+            end = min(self.ends[i], other.ends[j])
+            if start < end:
+                result.starts.append(start)
+                result.ends.append(end)
+            if self.ends[i] < other.ends[j]:
+                i += 1
+            else:
+                j += 1
+        return result
+
+    def to_dicts(self, tz=IST):
+        """Format as [{'start': iso, 'end': iso}] in the given timezone"""
+        return [
+            {
+                'start': datetime.fromtimestamp(start, tz).isoformat(),
+                'end': datetime.fromtimestamp(end, tz).isoformat()
+            }
+            for start, end in zip(self.starts, self.ends)
+        ]
@@ -0,0 +1,40 @@
+"""Step generators: pipeline code written once for the sync and async schedulers
+
+A step generator yields a zero-argument callable for each blocking step (an LLM call,
+a calendar fetch) and is sent back its result, or has its exception thrown in at the
+yield. Everything between the yields is plain computation shared by both flavours;
+run_steps calls each step inline, arun_steps awaits it.
+"""
+
+def run_steps(steps):
+    """Drive a step generator, calling each step; returns the generator's return value"""
+    try:
+        step = next(steps)
+        while True:
+            try:
+                result = step()
+            except Exception as e:
+                step = steps.throw(e)
+            else:
+                step = steps.send(result)
+    except StopIteration as done:
+        return done.value
+    finally:
+        # Runs the generator's cleanup if we stop early (e.g. interrupted)
+        steps.close()
+
+async def arun_steps(steps):
+    """Async variant of run_steps: each step returns an awaitable"""
+    try:
+        step = next(steps)
+        while True:
+            try:
+                result = await step()
+            except Exception as e:
+                step = steps.throw(e)
+            else:
+                step = steps.send(result)
+    except StopIteration as done:
+        return done.value
+    finally:
+        steps.close()
@@ -1,6 +1,10 @@
 from datetime import datetime, timedelta, timezone
 import re
 
+# Patterns shared by parse_time_constraint and the rule-based extractor
+WEEKDAY_PATTERN = re.compile(r'(monday|tuesday|wednesday|thursday|friday|saturday|sunday)')
+CLOCK_TIME_PATTERN = re.compile(r'(\d{1,2}):(\d{2})\s*(am|pm|a\.m\.|p\.m\.)?', re.IGNORECASE)
+
 def parse_datetime_string(datetime_str):
     """Parse various datetime string formats"""
     # Handle the format from input JSON: "19-07-2025T12:34:55"
@@ -55,10 +59,10 @@ def parse_time_constraint(constraint, reference_date):
         reference_date = reference_date.replace(tzinfo=timezone(timedelta(hours=5, minutes=30)))
     
     # Extract day of week
-    weekday_match = re.search(r'(monday|tuesday|wednesday|thursday|friday|saturday|sunday)', constraint_lower)
+    weekday_match = WEEKDAY_PATTERN.search(constraint_lower)
     
     # Extract time
-    time_match = re.search(r'(\d{1,2}):(\d{2})\s*(am|pm|a\.m\.|p\.m\.)?', constraint_lower, re.IGNORECASE)
+    time_match = CLOCK_TIME_PATTERN.search(constraint_lower)
     
     target_date = reference_date
     target_time = None
@@ -167,4 +171,14 @@ def calculate_search_range(request_datetime, time_constraint=None):
         start_date = base_date.replace(hour=0, minute=0, second=0, microsecond=0)
         end_date = start_date + timedelta(days=7)
     
-    return start_date.isoformat(), end_date.isoformat()
\ No newline at end of file
+    return start_date.isoformat(), end_date.isoformat()
+
+def to_epoch_seconds(datetime_str):
+    """Convert an ISO datetime (or all-day YYYY-MM-DD date) string to epoch seconds"""
+    if 'T' not in datetime_str:
+        # All-day events carry a bare date; treat it as IST midnight
+        datetime_str = datetime_str + "T00:00:00+05:30"
+    dt = datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone(timedelta(hours=5, minutes=30)))
+    return int(dt.timestamp())
@@ -0,0 +1,121 @@
+import atexit
+import contextvars
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from contextlib import contextmanager
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+logger = logging.getLogger(__name__)
+
+# Span that new spans attach to; copied into worker threads by submit_in_context
+_current_span = contextvars.ContextVar("current_span", default=None)
+_listener = None
+
+def configure_logging(level=None, debug=False):
+    """Route logging through a queue so handlers write to stderr off the request thread
+
+    The level comes from the argument, then LOG_LEVEL, defaulting to INFO (DEBUG when
+    debug is set). Per-request detail is logged at DEBUG, so the default level keeps
+    stream writes and pretty-printing off the hot path.
+    """
+    global _listener
+    if level is None:
+        level = "DEBUG" if debug else os.environ.get("LOG_LEVEL", "INFO")
+    root = logging.getLogger()
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_queue = queue.SimpleQueue()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+class Span:
+    """One timed step of a request; children are the steps it contains"""
+    __slots__ = ('name', 'attrs', 'started', 'duration_ms', 'children')
+
+    def __init__(self, name, attrs=None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.started = time.perf_counter()
+        self.duration_ms = None
+        self.children = []
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self.started) * 1000, 3)
+
+    def timings_ms(self):
+        """Flat {span name: total ms} over the whole tree; repeated names are summed"""
+        timings = {}
+        stack = [self]
+        while stack:
+            span = stack.pop()
+            if span.duration_ms is not None:
+                timings[span.name] = round(timings.get(span.name, 0) + span.duration_ms, 3)
+            stack.extend(reversed(span.children))
+        return timings
+
+    def to_dict(self):
+        """Nested representation of the span tree"""
+        node = {"name": self.name, "duration_ms": self.duration_ms}
+        if self.attrs:
+            node["attrs"] = self.attrs
+        if self.children:
+            node["children"] = [child.to_dict() for child in self.children]
+        return node
+
+    def format_tree(self, depth=0):
+        """Indented one-line-per-span rendering for debug logs"""
+        duration = "running" if self.duration_ms is None else f"{self.duration_ms:.1f} ms"
+        lines = [f"{'  ' * depth}{self.name}: {duration}"]
+        for child in self.children:
+            lines.append(child.format_tree(depth + 1))
+        return "\n".join(lines)
+
+@contextmanager
+def start_trace(name, **attrs):
+    """Open the root span for one request; spans opened inside it attach to it"""
+    root = Span(name, attrs)
+    token = _current_span.set(root)
+    try:
+        yield root
+    finally:
+        root.finish()
+        _current_span.reset(token)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Trace:\n%s", root.format_tree())
+
+@contextmanager
+def span(name, **attrs):
+    """Time a step under the current span; a no-op outside a trace"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, attrs)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    finally:
+        child.finish()
+        _current_span.reset(token)
+
+def current_span():
+    """The innermost open span, or None outside a trace"""
+    return _current_span.get()
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    """executor.submit that carries the caller's trace into the worker thread"""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)